@@ -0,0 +1,1580 @@
+"""
+Flask API service that uses ocr-code modules for OCR processing.
+This service accepts file uploads and returns structured JSON data.
+
+Speed / behaviour (env):
+  OCR_MAX_EDGE              — max longest image side before OCR (default 1600; smaller = faster).
+  OCR_USE_TEXTLINE_ORIENTATION — 1 to enable (slower on CPU). Default 0.
+  OCR_TEXT_DET_LIMIT_SIDE_LEN — detection resize limit (default 960; lower = faster).
+  OCR_SECOND_PASS           — reported by /health only; a single OCR pass on the original image always runs.
+  OCR_LOG_FULL_JSON         — 1 = log full response JSON (slow on large text).
+  OCR_LOG_LEVEL             — DEBUG / INFO / WARNING (default INFO). Per-request detail (parser trace,
+                              CBC table) is DEBUG unless the request sends ?verbose=1 or X-OCR-Verbose: 1.
+  OCR_BATCH_SIZE            — images per detector call on /api/extract/batch (default 8).
+  OCR_MAX_BATCH_FILES       — max files accepted by one /api/extract/batch request (default 32).
+  OCR_POOL_SIZE             — PaddleOCR engines built and warmed at startup (default 1).
+  OCR_POOL_TIMEOUT          — seconds a request waits for a free engine (default 120). With OCR_WORKERS > 0
+                              it bounds each mini-batch's queueing plus OCR time; a mini-batch that overruns
+                              fails its own images with "OCR timed out".
+  OCR_WORKERS               — >0 runs OCR in that many worker processes instead of the in-process pool.
+  OCR_WORKER_THREADS        — CPU threads pinned per OCR worker process (default 1).
+  OCR_CACHE_SIZE            — OCR results kept in the in-memory LRU cache (default 256; 0 = off).
+  OCR_CACHE_DIR             — optional directory persisting cached OCR results across restarts.
+  OCR_CACHE_DIR_MAX_MB      — size cap of OCR_CACHE_DIR (default 512; 0 = no cap); least recently used
+                              entries are deleted first.
+  OCR_MAX_UPLOAD_MB         — per-file upload limit (default 10, as in upload.js). Request bodies larger than
+                              one file (/api/extract) or OCR_MAX_BATCH_FILES files (/batch) get 413 unread.
+  OCR_SAVE_UPLOADS          — 1 = also keep each upload under uploads/ (default 0: decoded in memory only).
+  OCR_SAVE_ARTIFACTS        — 0 = skip json_results/ + raw_data/ bundles (default 1; always 0 under
+                              OCR_ENGINE=stub, which replays raw_data/).
+  OCR_ARTIFACT_QUEUE        — pending artifact writes before new ones are dropped (default 256).
+  OCR_ARTIFACT_BATCH        — artifact files written per fsync round (default 16).
+  OCR_METRICS_WINDOW        — recent samples per stage used for /metrics quantiles (default 1024).
+  OCR_ENGINE                — paddle (default) or stub: replay ocr_code/raw_data pages with a fixed
+                              latency instead of running PaddleOCR (load tests; see stub_engine.py).
+"""
+
+import atexit
+import hashlib
+import io
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+# Paddle 3.x + OneDNN on Windows can raise NotImplementedError in onednn_instruction
+os.environ.setdefault("PADDLE_PDX_ENABLE_MKLDNN_BYDEFAULT", "0")
+os.environ.setdefault("FLAGS_use_mkldnn", "0")
+from datetime import datetime
+from flask import Flask, Request, Response, request, jsonify
+from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+ocr_code_path = os.path.join(os.path.dirname(__file__), "ocr_code")
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ocr_common import compact_ocr_result, decode_image, ocr_pages, resize_to_edge, warmup_image
+
+logger = logging.getLogger("hmh.ocr")
+
+
+def configure_logging(level_name: str) -> None:
+    """
+    Route hmh.ocr records through a queue to a background stdout writer, so
+    request threads never block on console I/O. Safe to call more than once.
+    """
+    level = logging.getLevelName(level_name.strip().upper())
+    logger.setLevel(level if isinstance(level, int) else logging.INFO)
+    if any(isinstance(h, QueueHandler) for h in logger.handlers):
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s  %(message)s"))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.propagate = False
+
+
+configure_logging(os.environ.get("OCR_LOG_LEVEL", "INFO"))
+
+OCR_ENGINE = os.environ.get("OCR_ENGINE", "paddle").strip().lower()
+PADDLEOCR_AVAILABLE = False
+if OCR_ENGINE == "stub":
+    from stub_engine import StubOcrEngine
+
+    OCR_ENGINE_AVAILABLE = True
+    logger.warning("OCR_ENGINE=stub: replaying captured OCR pages, PaddleOCR is not used")
+else:
+    if OCR_ENGINE != "paddle":
+        logger.warning("Unknown OCR_ENGINE=%r, using paddle", OCR_ENGINE)
+        OCR_ENGINE = "paddle"
+    try:
+        from paddleocr import PaddleOCR
+
+        PADDLEOCR_AVAILABLE = True
+    except ImportError:
+        logger.warning("PaddleOCR not available. Install with: pip install paddleocr")
+    OCR_ENGINE_AVAILABLE = PADDLEOCR_AVAILABLE
+
+try:
+    from ocr_code.parsers import parse_medical_report
+    from ocr_code.parsers.cbc_core_extractor import CANON_KEYS, summarize_fourteen_fields
+
+    PARSERS_AVAILABLE = True
+except ImportError as e:
+    CANON_KEYS = []
+    summarize_fourteen_fields = None  # type: ignore
+    PARSERS_AVAILABLE = False
+    logger.warning("Parsers not available: %s", e)
+
+app = Flask(__name__)
+CORS(app)
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "uploads")
+ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "bmp", "gif", "tiff", "webp", "pdf"}
+# Multipart boundaries, part headers and small form fields on top of the file bytes.
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    v = os.environ.get(name)
+    if v is None:
+        return default
+    return v.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, str(default)).strip())
+    except ValueError:
+        return default
+
+
+OCR_MAX_EDGE = _env_int("OCR_MAX_EDGE", 1600)
+OCR_USE_TEXTLINE_ORI = _env_bool("OCR_USE_TEXTLINE_ORIENTATION", False)
+OCR_DET_LIMIT_SIDE = _env_int("OCR_TEXT_DET_LIMIT_SIDE_LEN", 960)
+OCR_SECOND_PASS = _env_bool("OCR_SECOND_PASS", False)
+OCR_LOG_FULL_JSON = _env_bool("OCR_LOG_FULL_JSON", False)
+OCR_BATCH_SIZE = max(1, _env_int("OCR_BATCH_SIZE", 8))
+OCR_MAX_BATCH_FILES = max(1, _env_int("OCR_MAX_BATCH_FILES", 32))
+OCR_POOL_SIZE = max(1, _env_int("OCR_POOL_SIZE", 1))
+OCR_POOL_TIMEOUT = max(1, _env_int("OCR_POOL_TIMEOUT", 120))
+OCR_WORKERS = max(0, _env_int("OCR_WORKERS", 0))
+OCR_WORKER_THREADS = max(1, _env_int("OCR_WORKER_THREADS", 1))
+OCR_CACHE_SIZE = max(0, _env_int("OCR_CACHE_SIZE", 256))
+OCR_CACHE_DIR = os.environ.get("OCR_CACHE_DIR", "").strip()
+OCR_CACHE_DIR_MAX_BYTES = max(0, _env_int("OCR_CACHE_DIR_MAX_MB", 512)) * 1024 * 1024
+OCR_MAX_UPLOAD_BYTES = max(1, _env_int("OCR_MAX_UPLOAD_MB", 10)) * 1024 * 1024
+OCR_SAVE_UPLOADS = _env_bool("OCR_SAVE_UPLOADS", False)
+# The stub replays raw_data/ (also the parser benchmark corpus); its own bundles must not land there.
+OCR_SAVE_ARTIFACTS = _env_bool("OCR_SAVE_ARTIFACTS", True) and OCR_ENGINE != "stub"
+if OCR_ENGINE == "stub" and _env_bool("OCR_SAVE_ARTIFACTS", False):
+    logger.warning("OCR_SAVE_ARTIFACTS ignored under OCR_ENGINE=stub (it would write into the replay corpus)")
+OCR_ARTIFACT_QUEUE = max(1, _env_int("OCR_ARTIFACT_QUEUE", 256))
+OCR_ARTIFACT_BATCH = max(1, _env_int("OCR_ARTIFACT_BATCH", 16))
+OCR_METRICS_WINDOW = max(16, _env_int("OCR_METRICS_WINDOW", 1024))
+
+if OCR_SAVE_UPLOADS:
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Largest body any route accepts; receive_files() checks the per-route cap against Content-Length.
+app.config["MAX_CONTENT_LENGTH"] = OCR_MAX_UPLOAD_BYTES * OCR_MAX_BATCH_FILES + UPLOAD_FORM_OVERHEAD
+
+
+class UploadBuffer(io.BytesIO):
+    """In-memory file part that stops storing at OCR_MAX_UPLOAD_BYTES and records that it overflowed."""
+
+    overflowed = False
+
+    def write(self, b) -> int:
+        room = OCR_MAX_UPLOAD_BYTES - self.tell()
+        if len(b) > room:
+            self.overflowed = True
+            super().write(memoryview(b)[: max(room, 0)])
+            return len(b)
+        return super().write(b)
+
+
+class UploadRequest(Request):
+    """
+    Request whose multipart file parts are received straight into an
+    UploadBuffer. Werkzeug's default stream factory spools parts of bodies
+    over 500 KB to temporary files, so uploads went through disk first.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return UploadBuffer()
+
+
+app.request_class = UploadRequest
+
+# Shared by the in-process pool and the worker processes.
+OCR_ENGINE_OPTIONS = {
+    "lang": "en",
+    "device": "cpu",
+    "enable_mkldnn": False,
+    "use_textline_orientation": OCR_USE_TEXTLINE_ORI,
+    "text_det_limit_side_len": OCR_DET_LIMIT_SIDE,
+    "det_db_box_thresh": 0.5,
+    "det_db_unclip_ratio": 1.5,
+}
+
+
+def log_section(title: str, subtitle: str = "", *args, level: int = logging.INFO) -> None:
+    """Stage header; subtitle is a %-format string filled from args only if emitted."""
+    if logger.isEnabledFor(level):
+        logger.log(level, "═══ " + title + (" | " + subtitle if subtitle else ""), *args)
+
+
+def log_subsection(title: str, *args) -> None:
+    """Debug-level step header; title is a %-format string filled from args only if emitted."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("─── " + title, *args)
+
+
+def request_verbose() -> bool:
+    """Per-request opt-in to the detailed trace: ?verbose=1 or X-OCR-Verbose: 1."""
+    flag = request.args.get("verbose") or request.headers.get("X-OCR-Verbose") or ""
+    return flag.strip().lower() in ("1", "true", "yes", "on")
+
+
+def detail_level(verbose: bool) -> int:
+    return logging.INFO if verbose else logging.DEBUG
+
+
+def parser_log(verbose: bool):
+    """Log sink for parse_medical_report, or None so the parser formats nothing."""
+    level = detail_level(verbose)
+    if not logger.isEnabledFor(level):
+        return None
+    parser_logger = logger.getChild("parser")
+    return lambda msg: parser_logger.log(level, msg)
+
+
+class StageMetrics:
+    """
+    Per-stage latency for the extract pipeline, served by /metrics.
+
+    Each stage keeps a running count / sum plus the last `window` samples,
+    from which p50 / p95 / p99 are computed at scrape time. observe() is
+    O(1) and safe from request threads, the worker collector and the
+    artifact writer.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, window: int):
+        self._window = window
+        self._lock = threading.Lock()
+        self._stages: dict = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = [0, 0.0, deque(maxlen=self._window)]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2].append(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def snapshot(self) -> dict:
+        """{stage: {"count", "sum", "quantiles": {q: seconds}}} over the current window."""
+        with self._lock:
+            copied = {k: (n, total, sorted(recent)) for k, (n, total, recent) in self._stages.items()}
+        out = {}
+        for stage, (n, total, recent) in copied.items():
+            out[stage] = {
+                "count": n,
+                "sum": total,
+                "quantiles": {
+                    q: recent[min(len(recent) - 1, int(q * len(recent)))] for q in self.QUANTILES
+                },
+            }
+        return out
+
+    def render(self) -> str:
+        """Prometheus text exposition (a summary metric labelled by stage)."""
+        name = "hmh_ocr_stage_seconds"
+        lines = [
+            f"# HELP {name} Latency of each OCR pipeline stage (quantiles over the last "
+            f"{self._window} samples).",
+            f"# TYPE {name} summary",
+        ]
+        for stage, data in sorted(self.snapshot().items()):
+            for q, v in data["quantiles"].items():
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {v:.6f}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {data["sum"]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {data["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+stage_metrics = StageMetrics(OCR_METRICS_WINDOW)
+
+
+def resize_for_ocr(img, max_edge: int = OCR_MAX_EDGE):
+    """Downscale large photos before OCR — largest win for CPU runtime."""
+    if img is None:
+        return None
+    out = resize_to_edge(img, max_edge)
+    if out is not img:
+        (h, w), (new_h, new_w) = img.shape[:2], out.shape[:2]
+        log_subsection("Resize for OCR: %dx%d → %dx%d (max edge %d)", w, h, new_w, new_h, max_edge)
+    return out
+
+
+def create_ocr_engine():
+    """Build one OCR engine: PaddleOCR tuned for CPU speed, or the stub under OCR_ENGINE=stub."""
+    if OCR_ENGINE == "stub":
+        return StubOcrEngine.from_env()
+    return PaddleOCR(**OCR_ENGINE_OPTIONS)
+
+
+# Put on the idle queue when warmup fails, so blocked checkouts raise at once.
+_POOL_FAILED = object()
+
+
+class OcrEnginePool:
+    """
+    Fixed-size pool of pre-warmed PaddleOCR engines.
+
+    Engines are built and warmed with a dummy inference in a background thread
+    at startup, so the first user after a restart does not pay for model load.
+    Requests check an engine out for the duration of a with-block. If any
+    engine fails to warm up the whole pool fails: engines already warmed are
+    dropped and every checkout raises error, matching the 503 from /health.
+    """
+
+    def __init__(self, size: int, factory):
+        self.size = size
+        self._factory = factory
+        self._idle: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._in_use = 0
+        self._warmed = 0
+        self._waiting = 0
+        self.error: str | None = None
+
+    def start(self) -> None:
+        threading.Thread(target=self._warm_up, name="ocr-pool-warmup", daemon=True).start()
+
+    def _warm_up(self) -> None:
+        log_section(
+            "PaddleOCR pool init",
+            "warming %d engine(s) | textline_orientation=%s, text_det_limit_side_len=%s",
+            self.size,
+            OCR_USE_TEXTLINE_ORI,
+            OCR_DET_LIMIT_SIDE,
+        )
+        dummy = warmup_image()
+        try:
+            for i in range(self.size):
+                t0 = datetime.now()
+                engine = self._factory()
+                engine.ocr(dummy)
+                with self._lock:
+                    self._warmed += 1
+                self._idle.put(engine)
+                logger.info(
+                    "Engine %d/%d warmed in %.2fs",
+                    i + 1,
+                    self.size,
+                    (datetime.now() - t0).total_seconds(),
+                )
+            self._ready.set()
+            logger.info("PaddleOCR pool ready.")
+        except Exception as e:
+            with self._lock:
+                self.error = f"{type(e).__name__}: {e}"
+                while True:
+                    try:
+                        self._idle.get_nowait()
+                    except queue.Empty:
+                        break
+                self._warmed = 0
+            # Wakes requests already blocked in checkout().
+            self._idle.put(_POOL_FAILED)
+            logger.exception("PaddleOCR pool init FAILED: %s", self.error)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None):
+        """Borrow an engine; raises RuntimeError if the pool failed, is empty, or none frees up in time."""
+        if self.error:
+            raise RuntimeError(self.error)
+        if self.size == 0:
+            raise RuntimeError("OCR engine pool is empty")
+        with self._lock:
+            self._waiting += 1
+        try:
+            engine = self._idle.get(timeout=OCR_POOL_TIMEOUT if timeout is None else timeout)
+        except queue.Empty:
+            raise RuntimeError(
+                self.error or "No OCR engine available (pool busy or still warming up)"
+            ) from None
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        if engine is _POOL_FAILED:
+            self._idle.put(engine)
+            raise RuntimeError(self.error)
+        with self._lock:
+            self._in_use += 1
+        try:
+            yield engine
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            if not self.error:
+                self._idle.put(engine)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "warmed": self._warmed,
+                "in_use": self._in_use,
+                "idle": max(0, self._warmed - self._in_use),
+                "waiting": self._waiting,
+                "ready": self.ready,
+                "error": self.error,
+            }
+
+
+class OcrResultCache:
+    """
+    LRU cache of compact OCR payloads keyed on sha256(OCR tuning knobs + upload
+    bytes), so a re-uploaded report skips PaddleOCR. Optionally backed by one
+    JSON file per entry in cache_dir, which survives restarts.
+
+    The directory is kept under disk_max_bytes (0 = no cap): a disk hit
+    touches its file's mtime, and once writes push the directory over the
+    cap the oldest files by mtime are deleted until it is back under 90% of
+    it. The size is re-read from the directory on each prune, so several
+    processes can share one cache_dir.
+    """
+
+    def __init__(self, capacity: int, cache_dir: str | None, settings: dict, disk_max_bytes: int = 0):
+        self.capacity = capacity
+        self.cache_dir = cache_dir or None
+        self.disk_max_bytes = disk_max_bytes
+        self._salt = json.dumps(settings, sort_keys=True).encode("utf-8")
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.disk_pruned = 0
+        self.misses = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            if self.disk_max_bytes and self._disk_bytes > self.disk_max_bytes:
+                self._prune_disk()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0 or self.cache_dir is not None
+
+    def key(self, data: bytes) -> str:
+        digest = hashlib.sha256(self._salt)
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.cache_dir:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                payload = None
+            if payload is not None:
+                try:
+                    os.utime(self._path(key))
+                except OSError:
+                    pass
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                self._remember(key, payload)
+                return payload
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, payload: dict) -> None:
+        self._remember(key, payload)
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                with open(path + ".tmp", "wb") as f:
+                    f.write(body)
+                os.replace(path + ".tmp", path)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning("OCR cache write failed (%s): %s: %s", key[:12], type(e).__name__, e)
+                return
+            with self._lock:
+                self._disk_bytes += len(body)
+                over = self.disk_max_bytes and self._disk_bytes > self.disk_max_bytes
+            if over:
+                self._prune_disk()
+
+    def _disk_files(self) -> list:
+        """(mtime, size, path) of every entry file in cache_dir."""
+        files = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, entry.path))
+        except OSError as e:
+            logger.warning("OCR cache dir scan failed: %s: %s", type(e).__name__, e)
+        return files
+
+    def _prune_disk(self) -> None:
+        """Delete the least recently used entry files until cache_dir is under 90% of disk_max_bytes."""
+        if not self._prune_lock.acquire(blocking=False):
+            return  # another thread is already pruning
+        try:
+            files = sorted(self._disk_files())
+            total = sum(size for _, size, _ in files)
+            target = self.disk_max_bytes * 9 // 10
+            removed = 0
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            with self._lock:
+                self._disk_bytes = total
+                self.disk_pruned += removed
+            log_subsection("OCR cache dir pruned: %d file(s) removed, %d bytes left", removed, total)
+        finally:
+            self._prune_lock.release()
+
+    def _remember(self, key: str, payload: dict) -> None:
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "disk_dir": self.cache_dir,
+                "disk_bytes": self._disk_bytes,
+                "disk_max_bytes": self.disk_max_bytes,
+                "disk_pruned": self.disk_pruned,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+result_cache = OcrResultCache(
+    OCR_CACHE_SIZE,
+    OCR_CACHE_DIR,
+    {
+        "max_edge": OCR_MAX_EDGE,
+        "det_limit_side": OCR_DET_LIMIT_SIDE,
+        "textline_orientation": OCR_USE_TEXTLINE_ORI,
+    },
+    OCR_CACHE_DIR_MAX_BYTES,
+)
+engine_pool = OcrEnginePool(OCR_POOL_SIZE, create_ocr_engine)
+worker_tier = None
+# Spawned OCR workers re-run this module as __mp_main__; only the parent owns engines.
+if OCR_ENGINE_AVAILABLE and __name__ != "__mp_main__":
+    if OCR_WORKERS:
+        from ocr_workers import OcrWorkerTier
+
+        log_section(
+            "OCR worker tier init", "%d process(es) × %d thread(s)", OCR_WORKERS, OCR_WORKER_THREADS
+        )
+        worker_tier = OcrWorkerTier(
+            OCR_WORKERS,
+            OCR_ENGINE_OPTIONS,
+            OCR_WORKER_THREADS,
+            OCR_MAX_EDGE,
+            observe=stage_metrics.observe,
+            engine=OCR_ENGINE,
+        ).start()
+    else:
+        engine_pool.start()
+
+
+def _poly_reading_key(poly) -> tuple:
+    try:
+        if hasattr(poly, "tolist"):
+            poly = poly.tolist()
+        pts = [p for p in poly]
+        ys = [float(p[1]) for p in pts]
+        xs = [float(p[0]) for p in pts]
+        yc = sum(ys) / len(ys)
+        xmin = min(xs)
+        return (yc, xmin)
+    except (TypeError, ValueError, IndexError, ZeroDivisionError):
+        return (0.0, 0.0)
+
+
+def sort_rec_texts_by_geometry(rec_texts: list, polys) -> list:
+    if not rec_texts:
+        return []
+    if not polys or len(polys) != len(rec_texts):
+        log_subsection(
+            "Reading order: no geometry sort (polys=%s, len_polys=%d, len_texts=%d)",
+            "present" if polys else "missing",
+            len(polys) if polys else 0,
+            len(rec_texts),
+        )
+        return [str(t).strip() for t in rec_texts if t and str(t).strip()]
+
+    paired = []
+    for txt, poly in zip(rec_texts, polys):
+        key = _poly_reading_key(poly)
+        paired.append((key[0], key[1], str(txt).strip()))
+    paired.sort(key=lambda x: (x[0], x[1]))
+    out = [p[2] for p in paired if p[2]]
+    log_subsection("Reading order: reordered %d line(s) by box (top→bottom, left→right)", len(out))
+    return out
+
+
+def unwrap_ocr_result(result) -> tuple:
+    if not result or not isinstance(result, list) or len(result) == 0:
+        return [], None, "empty"
+    first = result[0]
+    if isinstance(first, dict):
+        texts = list(first.get("rec_texts") or [])
+        polys = (
+            first.get("det_polys")
+            or first.get("dt_polys")
+            or first.get("rec_polys")
+            or first.get("polys")
+        )
+        return texts, polys, "dict"
+    if isinstance(first, list):
+        texts = []
+        for line in first:
+            if isinstance(line, list) and len(line) >= 2:
+                t = (
+                    line[1][0]
+                    if isinstance(line[1], (list, tuple)) and len(line[1]) > 0
+                    else str(line[1])
+                )
+                texts.append(t)
+        return texts, None, "legacy_list"
+    return [], None, "empty"
+
+
+def score_rec_texts(rec_texts: list) -> tuple:
+    clean = [str(t).strip() for t in (rec_texts or []) if t and str(t).strip()]
+    return len(clean), sum(len(s) for s in clean)
+
+
+def normalize_ocr_result(raw, wall_seconds: float) -> dict:
+    """Unwrap one page of Paddle output and sort it into reading order."""
+    rec_raw, polys, mode = unwrap_ocr_result(raw)
+    log_subsection("Unwrap mode: %s | raw line count: %d", mode, len(rec_raw))
+
+    with stage_metrics.timer("sort"):
+        rec_sorted = sort_rec_texts_by_geometry(rec_raw, polys)
+    n_lines, n_chars = score_rec_texts(rec_sorted)
+    all_text = " ".join(rec_sorted)
+    log_subsection(
+        "After sort: %d lines, %d non-space chars, all_text len=%d", n_lines, n_chars, len(all_text)
+    )
+
+    return {
+        "result": raw,
+        "rec_texts": rec_sorted,
+        "rec_raw": rec_raw,
+        "polys": polys,
+        "unwrap_mode": mode,
+        "all_text": all_text.strip(),
+        "score_lines": n_lines,
+        "score_chars": n_chars,
+        "wall_seconds": wall_seconds,
+    }
+
+
+def _ocr_one(ocr, img) -> tuple:
+    """OCR a single image; (payload, None), or (None, error) if the engine raises."""
+    t0 = datetime.now()
+    try:
+        raw = ocr_pages(ocr, [img])[0]
+    except Exception as e:
+        logger.warning("OCR failed for one image: %s: %s", type(e).__name__, e)
+        return None, str(e) or type(e).__name__
+    dt = (datetime.now() - t0).total_seconds()
+    stage_metrics.observe("det_rec", dt)
+    return {"result": compact_ocr_result(raw), "wall_seconds": dt}, None
+
+
+def run_ocr_batch(ocr, images: list, pass_label: str) -> list:
+    """
+    OCR many images in detector-sized mini-batches of OCR_BATCH_SIZE.
+
+    PaddleOCR 3.x predict() takes a list and returns one page per image; 2.x
+    engines only have ocr(), so they fall back to one call per image. Returns
+    one ({"result", "wall_seconds"}, error) pair per image, in input order
+    (wall_seconds is the image's share of its mini-batch). A mini-batch that
+    raises is re-run one image at a time, so only the images that fail on
+    their own get an error.
+    """
+    out = []
+    for start in range(0, len(images), OCR_BATCH_SIZE):
+        chunk = images[start : start + OCR_BATCH_SIZE]
+        log_subsection(
+            "OCR batch: %s [%d–%d of %d]", pass_label, start + 1, start + len(chunk), len(images)
+        )
+        if len(chunk) == 1:
+            out.append(_ocr_one(ocr, chunk[0]))
+            continue
+        t0 = datetime.now()
+        try:
+            raws = ocr_pages(ocr, chunk)
+        except Exception as e:
+            logger.warning(
+                "OCR mini-batch [%d–%d] failed (%s: %s); retrying one image at a time",
+                start + 1,
+                start + len(chunk),
+                type(e).__name__,
+                e,
+            )
+            out.extend(_ocr_one(ocr, img) for img in chunk)
+            continue
+        dt = (datetime.now() - t0).total_seconds()
+        log_subsection("detector wall time: %.2fs for %d image(s)", dt, len(chunk))
+        for raw in raws:
+            stage_metrics.observe("det_rec", dt / len(chunk))
+            out.append(({"result": compact_ocr_result(raw), "wall_seconds": dt / len(chunk)}, None))
+    return out
+
+
+def _ocr_uncached(blobs: list, pass_label: str) -> list:
+    """
+    OCR encoded image bytes on the worker tier (OCR_WORKERS > 0) or the
+    in-process engine pool. Returns one (payload, error) pair per blob.
+    """
+    if worker_tier is not None:
+        # Mini-batches spread across workers; they decode + resize themselves.
+        log_subsection("OCR dispatch: %s (%d image(s) → workers)", pass_label, len(blobs))
+        chunks = [blobs[start : start + OCR_BATCH_SIZE] for start in range(0, len(blobs), OCR_BATCH_SIZE)]
+        futures = [worker_tier.submit(chunk) for chunk in chunks]
+        out = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                out.extend(future.result(timeout=OCR_POOL_TIMEOUT))
+            except FutureTimeoutError:
+                logger.warning("OCR worker mini-batch of %d image(s) timed out after %ds", len(chunk), OCR_POOL_TIMEOUT)
+                out.extend((None, "OCR timed out") for _ in chunk)
+            except RuntimeError as e:
+                # The worker died (or failed to start) with this mini-batch queued.
+                out.extend((None, str(e)) for _ in chunk)
+        return out
+
+    out: list = [None] * len(blobs)
+    images = []
+    slots = []
+    for i, data in enumerate(blobs):
+        with stage_metrics.timer("decode"):
+            img = decode_image(data)
+        if img is None:
+            out[i] = (None, "Could not read image file")
+            continue
+        log_subsection("Raw image shape: %s, dtype=%s", img.shape, img.dtype)
+        with stage_metrics.timer("resize"):
+            images.append(resize_for_ocr(img, OCR_MAX_EDGE))
+        slots.append(i)
+    if images:
+        with engine_pool.checkout() as ocr:
+            outcomes = run_ocr_batch(ocr, images, pass_label)
+        for i, outcome in zip(slots, outcomes):
+            out[i] = outcome
+    return out
+
+
+def ocr_uploads(blobs: list, pass_label: str) -> list:
+    """
+    OCR encoded upload bytes, serving repeats from result_cache.
+
+    Returns one (pass_dict, error) pair per blob, in input order; pass_dict is
+    normalize_ocr_result()-shaped plus "cache_hit".
+    """
+    keys = [result_cache.key(data) for data in blobs] if result_cache.enabled else []
+    payloads: list = [None] * len(blobs)
+    errors: list = [None] * len(blobs)
+    hits = set()
+    for i, key in enumerate(keys):
+        payloads[i] = result_cache.get(key)
+        if payloads[i] is not None:
+            hits.add(i)
+
+    missing = [i for i in range(len(blobs)) if i not in hits]
+    if hits:
+        log_subsection("OCR result cache: %d hit(s), %d miss(es)", len(hits), len(missing))
+    if missing:
+        fresh = _ocr_uncached([blobs[i] for i in missing], pass_label)
+        for i, (payload, error) in zip(missing, fresh):
+            payloads[i], errors[i] = payload, error
+            if payload is not None and keys:
+                result_cache.put(keys[i], payload)
+
+    out = []
+    for i, payload in enumerate(payloads):
+        if payload is None:
+            out.append((None, errors[i] or "OCR failed"))
+            continue
+        pass_dict = normalize_ocr_result(payload["result"], payload["wall_seconds"])
+        pass_dict["cache_hit"] = i in hits
+        out.append((pass_dict, None))
+    return out
+
+
+def parse_ocr_pass(pass_result: dict, verbose: bool) -> dict:
+    """CBC-parse one OCR pass; parse time and each phase that ran go to /metrics."""
+    phases: list = []
+    with stage_metrics.timer("parse"):
+        structured = parse_medical_report(
+            pass_result["rec_texts"],
+            all_text=pass_result["all_text"],
+            rec_texts_scan_order=pass_result.get("rec_raw"),
+            verbose=False,
+            log=parser_log(verbose),
+            phase_report=phases,
+        )
+    for entry in phases:
+        if entry["ran"]:
+            stage_metrics.observe(f"parse_{entry['phase']}", entry["ms"] / 1000.0)
+    return structured
+
+
+def count_cbc_rows(structured: dict) -> int:
+    return len((structured or {}).get("haematology_report") or [])
+
+
+def pick_best_pipeline(
+    structured_orig: dict,
+    structured_prep: dict | None,
+    pass_orig: dict,
+    pass_prep: dict | None,
+) -> tuple:
+    """
+    Prefer more CBC rows, then higher OCR (lines, chars), then Original on tie.
+    """
+    co = count_cbc_rows(structured_orig)
+    cp = count_cbc_rows(structured_prep) if structured_prep is not None else -1
+
+    log_subsection(
+        "Choose pipeline: Original CBC rows=%d, lines=%d, chars=%d",
+        co,
+        pass_orig["score_lines"],
+        pass_orig["score_chars"],
+    )
+    if pass_prep is not None and structured_prep is not None:
+        log_subsection(
+            "Choose pipeline: Preprocessed CBC rows=%d, lines=%d, chars=%d",
+            cp,
+            pass_prep["score_lines"],
+            pass_prep["score_chars"],
+        )
+    else:
+        log_subsection("Choose pipeline: Preprocessed (skipped or failed) ➜ Original")
+        return structured_orig, pass_orig, "Original", "preprocessed_unavailable"
+
+    if cp > co:
+        log_subsection("➜ Chosen: Preprocessed (more CBC fields parsed).")
+        return structured_prep, pass_prep, "Preprocessed", "more_cbc_rows"
+    if co > cp:
+        log_subsection("➜ Chosen: Original (more CBC fields parsed).")
+        return structured_orig, pass_orig, "Original", "more_cbc_rows"
+
+    so = (pass_orig["score_lines"], pass_orig["score_chars"])
+    sp = (pass_prep["score_lines"], pass_prep["score_chars"])
+    if sp > so:
+        log_subsection("➜ Chosen: Preprocessed (tie on CBC rows, higher OCR text score).")
+        return structured_prep, pass_prep, "Preprocessed", "tiebreaker_ocr_score"
+    log_subsection("➜ Chosen: Original (tie on CBC rows, equal or better OCR score).")
+    return structured_orig, pass_orig, "Original", "tiebreaker_ocr_score"
+
+
+def log_cbc_fourteen_table(summary: dict, level: int = logging.DEBUG) -> None:
+    if not logger.isEnabledFor(level):
+        return
+    w = 18
+    rows = []
+    for key in CANON_KEYS:
+        cell = summary.get(key) or {}
+        if cell.get("found"):
+            val = str(cell.get("observed_value", ""))
+            unit = str(cell.get("unit", ""))
+            tn = cell.get("test_name") or ""
+            rows.append(f"  {key.ljust(w)}  {val.ljust(14)}  {unit.ljust(12)}  |  {tn}")
+        else:
+            rows.append(f"  {key.ljust(w)}  {'—'.ljust(14)}  {'—'.ljust(12)}  |  (not found)")
+    logger.log(level, "═══ CBC — 14 FIELDS (chosen pipeline)\n%s", "\n".join(rows))
+
+
+def _pack_pass_raw(pass_dict: dict | None) -> dict | None:
+    if pass_dict is None:
+        return None
+    rec_raw = pass_dict.get("rec_raw") or []
+    return {
+        "rec_texts_ordered": list(pass_dict.get("rec_texts") or []),
+        "rec_texts_detector_order": [
+            str(x).strip() for x in rec_raw if x and str(x).strip()
+        ],
+        "all_text": pass_dict.get("all_text") or "",
+        "unwrap_mode": pass_dict.get("unwrap_mode"),
+        "wall_seconds": pass_dict.get("wall_seconds"),
+        "score_lines": pass_dict.get("score_lines"),
+        "score_chars": pass_dict.get("score_chars"),
+    }
+
+
+class ArtifactWriter:
+    """
+    Background writer for artifacts (extract bundles, kept uploads).
+
+    Requests enqueue (path, payload) without blocking; one thread serialises
+    payloads as compact JSON, writes them in batches and fsyncs each batch.
+    When the bounded queue is full the artifact is dropped and counted rather
+    than stalling the request.
+    """
+
+    def __init__(self, max_queue: int, batch_size: int):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def submit(self, path: str, payload) -> bool:
+        """Queue bytes or a JSON-serialisable object; False if it was dropped."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="artifact-writer", daemon=True
+                    )
+                    self._thread.start()
+        try:
+            self._queue.put_nowait((path, payload))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: list) -> None:
+        t0 = time.perf_counter()
+        handles = []
+        for path, payload in batch:
+            try:
+                if not isinstance(payload, (bytes, bytearray)):
+                    payload = json.dumps(
+                        payload, ensure_ascii=False, separators=(",", ":"), default=str
+                    ).encode("utf-8")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                f = open(path, "wb")
+                f.write(payload)
+                handles.append(f)
+            except (OSError, TypeError, ValueError) as e:
+                with self._lock:
+                    self.errors += 1
+                logger.warning("Artifact write failed %s: %s: %s", path, type(e).__name__, e)
+
+        # One fsync round per batch instead of one pair per request.
+        for f in handles:
+            try:
+                f.flush()
+                os.fsync(f.fileno())
+                with self._lock:
+                    self.written += 1
+            except OSError as e:
+                with self._lock:
+                    self.errors += 1
+                logger.warning("Artifact sync failed %s: %s: %s", f.name, type(e).__name__, e)
+            finally:
+                f.close()
+        # Each file's share of the serialise + write + fsync round.
+        share = (time.perf_counter() - t0) / len(batch)
+        for _ in batch:
+            stage_metrics.observe("artifact_save", share)
+
+    def drain(self, timeout: float = 5.0) -> None:
+        """Wait (bounded) for queued artifacts to hit disk — used at exit."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": OCR_SAVE_ARTIFACTS,
+                "queued": self._queue.qsize(),
+                "capacity": self._queue.maxsize,
+                "written": self.written,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
+
+
+artifact_writer = ArtifactWriter(OCR_ARTIFACT_QUEUE, OCR_ARTIFACT_BATCH)
+atexit.register(artifact_writer.drain)
+
+
+def save_ocr_artifacts(
+    ocr_root: str,
+    source_filename: str,
+    response_data: dict,
+    pass_original: dict,
+    pass_preprocessed: dict | None,
+    chosen_rec_texts: list,
+    chosen_all_text: str,
+    cbc_fourteen: dict,
+) -> tuple[str | None, str | None]:
+    """
+    Queue the full extract JSON and raw OCR text bundle under ocr-code on the
+    background artifact_writer. Returns the paths queued (None when disabled
+    or dropped because the writer is backed up).
+    """
+    if not OCR_SAVE_ARTIFACTS:
+        return None, None
+    stem = os.path.splitext(os.path.basename(source_filename))[0]
+    stem = re.sub(r"[^\w.\-]+", "_", stem).strip("_")[:80] or "image"
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base = f"extract_{stamp}_{stem}"
+    json_path = os.path.join(ocr_root, "json_results", f"{base}.json")
+    raw_path = os.path.join(ocr_root, "raw_data", f"{base}_raw.json")
+
+    structured_original = response_data.get("structured_data_original")
+    extract_payload = {
+        "success": response_data.get("success"),
+        "filename": response_data.get("filename"),
+        "processed_at": response_data.get("processed_at"),
+        "ocr_pass_used": response_data.get("ocr_pass_used"),
+        "ocr_compare": response_data.get("ocr_compare"),
+        "total_detections": response_data.get("total_detections"),
+        "all_text": response_data.get("all_text"),
+        "ocr_result": response_data.get("ocr_result"),
+        "cbc_fourteen": cbc_fourteen,
+        "structured_data": response_data.get("structured_data"),
+        # Same object as structured_data when Original wins — don't write it twice.
+        "structured_data_original": (
+            None if structured_original is response_data.get("structured_data") else structured_original
+        ),
+        "structured_data_preprocessed": response_data.get(
+            "structured_data_preprocessed"
+        ),
+    }
+
+    raw_payload = {
+        "source_filename": source_filename,
+        "processed_at": response_data.get("processed_at"),
+        "ocr_pass_used": response_data.get("ocr_pass_used"),
+        "ocr_compare": response_data.get("ocr_compare"),
+        "cbc_fourteen": cbc_fourteen,
+        "chosen_rec_texts_ordered": list(chosen_rec_texts),
+        "chosen_all_text": chosen_all_text or "",
+        "pass_original": _pack_pass_raw(pass_original),
+        "pass_preprocessed": _pack_pass_raw(pass_preprocessed),
+    }
+
+    queued_json = artifact_writer.submit(json_path, extract_payload)
+    queued_raw = artifact_writer.submit(raw_path, raw_payload)
+    if not (queued_json and queued_raw):
+        logger.warning("Artifacts dropped for %s (writer queue full)", source_filename)
+    return (json_path if queued_json else None), (raw_path if queued_raw else None)
+
+
+def build_extract_response(
+    filename: str,
+    pass_original: dict,
+    structured_original: dict,
+    pass_preprocessed: dict | None = None,
+    structured_preprocessed: dict | None = None,
+    preprocessed_error: str | None = None,
+    verbose: bool = False,
+) -> dict:
+    """
+    Pick the pipeline, build the /api/extract response body (incl. cbc_fourteen)
+    and save artifacts. Shared by the single-file and batch endpoints.
+    verbose raises the per-request detail (line preview, CBC table) to INFO.
+    """
+    structured_data, chosen_pass, chosen_label, reason = pick_best_pipeline(
+        structured_original,
+        structured_preprocessed,
+        pass_original,
+        pass_preprocessed,
+    )
+
+    result = chosen_pass["result"]
+    rec_texts = chosen_pass["rec_texts"]
+    all_text = chosen_pass["all_text"]
+    total_detections = len(rec_texts)
+
+    level = detail_level(verbose)
+    if logger.isEnabledFor(level):
+        preview = [f"    [{i:03d}] {line[:140]!r}" for i, line in enumerate(rec_texts[:12])]
+        if total_detections > 12:
+            preview.append(f"    ... {total_detections - 12} more line(s)")
+        logger.log(
+            level,
+            "═══ SELECTED FOR API RESPONSE | %s | reason=%s | detections=%d\n%s",
+            chosen_label,
+            reason,
+            total_detections,
+            "\n".join(preview),
+        )
+
+    ocr_result = []
+    if result and isinstance(result, list) and len(result) > 0:
+        first_item = result[0]
+        if isinstance(first_item, dict) and "rec_texts" in first_item:
+            for i, text in enumerate(first_item.get("rec_texts", [])):
+                ocr_result.append({"text": str(text).strip(), "index": i})
+        elif isinstance(first_item, list):
+            for line in first_item:
+                if isinstance(line, list) and len(line) >= 2:
+                    text = (
+                        line[1][0]
+                        if isinstance(line[1], (list, tuple)) and len(line[1]) > 0
+                        else str(line[1])
+                    )
+                    conf = (
+                        line[1][1]
+                        if isinstance(line[1], (list, tuple)) and len(line[1]) > 1
+                        else 0.0
+                    )
+                    ocr_result.append(
+                        {
+                            "text": str(text).strip(),
+                            "confidence": float(conf) if conf else 0.0,
+                        }
+                    )
+
+    ocr_compare = {
+        "original": {
+            "score_lines": pass_original["score_lines"],
+            "score_chars": pass_original["score_chars"],
+            "cbc_row_count": count_cbc_rows(structured_original),
+            "ocr_seconds": pass_original.get("wall_seconds"),
+            "total_detections": len(pass_original["rec_texts"]),
+            "cache_hit": bool(pass_original.get("cache_hit")),
+        },
+        "preprocessed": None,
+        "chosen": chosen_label,
+        "reason": reason,
+        "preprocessed_error": preprocessed_error,
+    }
+    if pass_preprocessed is not None:
+        ocr_compare["preprocessed"] = {
+            "score_lines": pass_preprocessed["score_lines"],
+            "score_chars": pass_preprocessed["score_chars"],
+            "cbc_row_count": count_cbc_rows(structured_preprocessed or {}),
+            "ocr_seconds": pass_preprocessed.get("wall_seconds"),
+            "total_detections": len(pass_preprocessed["rec_texts"]),
+        }
+
+    response_data = {
+        "success": True,
+        "filename": filename,
+        "all_text": all_text,
+        "total_detections": total_detections,
+        "ocr_pass_used": chosen_label,
+        "ocr_compare": ocr_compare,
+        "ocr_result": ocr_result,
+        "structured_data": structured_data,
+        "structured_data_original": structured_original,
+        "structured_data_preprocessed": structured_preprocessed,
+        "processed_at": datetime.now().isoformat(),
+    }
+
+    with stage_metrics.timer("summarize"):
+        cbc_fourteen = summarize_fourteen_fields(structured_data)
+    response_data["cbc_fourteen"] = cbc_fourteen
+    log_cbc_fourteen_table(cbc_fourteen, level)
+    save_ocr_artifacts(
+        ocr_code_path,
+        filename,
+        response_data,
+        pass_original,
+        pass_preprocessed,
+        rec_texts,
+        all_text,
+        cbc_fourteen,
+    )
+
+    return response_data
+
+
+class UploadTooLarge(ValueError):
+    """Upload exceeded OCR_MAX_UPLOAD_BYTES."""
+
+
+def receive_files(max_files: int):
+    """
+    request.files, with the request body capped at max_files uploads plus form
+    overhead. A larger Content-Length is refused with 413 before anything is
+    read; a chunked body is held to the app-wide MAX_CONTENT_LENGTH (the /batch
+    cap) and each file part to OCR_MAX_UPLOAD_BYTES by UploadBuffer. Parsing
+    the body is the network receive, so it is what "receive" times.
+    """
+    limit = OCR_MAX_UPLOAD_BYTES * max_files + UPLOAD_FORM_OVERHEAD
+    if request.content_length is not None and request.content_length > limit:
+        raise RequestEntityTooLarge()
+    t0 = time.perf_counter()
+    files = request.files
+    stage_metrics.observe("receive", time.perf_counter() - t0)
+    return files
+
+
+def read_upload(file, filename: str) -> bytes:
+    """
+    Bytes of one file part, already received into memory by UploadRequest;
+    raises UploadTooLarge if the part passed OCR_MAX_UPLOAD_BYTES. cv2.imdecode
+    later views these bytes without a copy. The file is queued for
+    UPLOAD_FOLDER only when OCR_SAVE_UPLOADS is on.
+    """
+    stream = file.stream
+    if isinstance(stream, io.BytesIO):
+        overflowed = getattr(stream, "overflowed", False)
+        data = stream.getvalue()
+    else:
+        data = stream.read(OCR_MAX_UPLOAD_BYTES + 1)
+        overflowed = len(data) > OCR_MAX_UPLOAD_BYTES
+    if overflowed:
+        raise UploadTooLarge(f"File too large. Maximum size: {OCR_MAX_UPLOAD_BYTES // (1024 * 1024)}MB")
+    if OCR_SAVE_UPLOADS:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        artifact_writer.submit(os.path.join(UPLOAD_FOLDER, f"{stamp}_{filename}"), data)
+    return data
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    mb = OCR_MAX_UPLOAD_BYTES // (1024 * 1024)
+    if request.path == "/api/extract":
+        error = f"File too large. Maximum size: {mb}MB"
+    else:
+        error = f"Request too large. Maximum: {OCR_MAX_BATCH_FILES} files of {mb}MB"
+    return jsonify({"success": False, "error": error}), 413
+
+
+def allowed_file(filename):
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+@app.route("/health", methods=["GET"])
+def health_check():
+    """Readiness: 200 once every pooled engine is warmed, 503 before that (or on failure)."""
+    pool = worker_tier.stats() if worker_tier is not None else engine_pool.stats()
+    if pool["ready"]:
+        status = "healthy"
+    elif pool["error"] or not OCR_ENGINE_AVAILABLE:
+        status = "unhealthy"
+    else:
+        status = "warming_up"
+    return jsonify(
+        {
+            "status": status,
+            "ready": pool["ready"],
+            "service": "OCR Service (using ocr-code)",
+            "paddleocr_available": PADDLEOCR_AVAILABLE,
+            "ocr_engine": OCR_ENGINE,
+            "parsers_available": PARSERS_AVAILABLE,
+            "ocr_backend": "workers" if worker_tier is not None else "in_process",
+            "engine_pool": pool,
+            "result_cache": result_cache.stats(),
+            "artifacts": artifact_writer.stats(),
+            "ocr_tuning": {
+                "max_edge": OCR_MAX_EDGE,
+                "textline_orientation": OCR_USE_TEXTLINE_ORI,
+                "det_limit_side": OCR_DET_LIMIT_SIDE,
+                "second_pass": OCR_SECOND_PASS,
+            },
+            "timestamp": datetime.now().isoformat(),
+        }
+    ), (200 if pool["ready"] else 503)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Per-stage latency (p50 / p95 / p99, sum, count) in Prometheus text format."""
+    return Response(stage_metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def _unavailable_response():
+    """500 response when the OCR engine or the parsers failed to import, else None."""
+    if not OCR_ENGINE_AVAILABLE:
+        return jsonify(
+            {
+                "success": False,
+                "error": "PaddleOCR is not available. Please install: pip install paddleocr",
+            }
+        ), 500
+
+    if not PARSERS_AVAILABLE:
+        return jsonify(
+            {
+                "success": False,
+                "error": "Parsers are not available. Please check ocr-code/parsers directory.",
+            }
+        ), 500
+    return None
+
+
+@app.route("/api/extract", methods=["POST"])
+def extract_report():
+    unavailable = _unavailable_response()
+    if unavailable is not None:
+        return unavailable
+
+    files = receive_files(1)
+    if "file" not in files:
+        return jsonify({"success": False, "error": "No file provided"}), 400
+
+    file = files["file"]
+    if file.filename == "":
+        return jsonify({"success": False, "error": "No file selected"}), 400
+
+    if not allowed_file(file.filename):
+        return jsonify(
+            {
+                "success": False,
+                "error": f'File type not allowed. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}',
+            }
+        ), 400
+
+    try:
+        filename = secure_filename(file.filename)
+        try:
+            data = read_upload(file, filename)
+        except UploadTooLarge as e:
+            return jsonify({"success": False, "error": str(e)}), 413
+
+        verbose = request_verbose()
+        log_section("NEW REQUEST", "file=%r | %d bytes | verbose=%s", filename, len(data), verbose)
+
+        # ─── Pass 1: original (always) — OCR + CBC parse (trace per request / log level)
+        log_subsection("PASS 1 — Original image: OCR then CBC parse")
+        t_pass1 = datetime.now()
+        pass_original, error = ocr_uploads([data], "1 — original BGR")[0]
+        if pass_original is None:
+            return jsonify({"success": False, "error": error}), (
+                400 if error == "Could not read image file" else 500
+            )
+        structured_original: dict = {}
+        if pass_original["rec_texts"]:
+            structured_original = parse_ocr_pass(pass_original, verbose)
+        log_subsection(
+            "Pass 1 CBC rows: %d (parser wall ~%.2fs total stage)",
+            count_cbc_rows(structured_original),
+            (datetime.now() - t_pass1).total_seconds(),
+        )
+
+        pass_preprocessed = None
+        structured_preprocessed = None
+        preprocessed_error = None
+        log_subsection("PASS 2 — disabled: single OCR pass only")
+
+        response_data = build_extract_response(
+            filename,
+            pass_original,
+            structured_original,
+            pass_preprocessed,
+            structured_preprocessed,
+            preprocessed_error,
+            verbose=verbose,
+        )
+
+        logger.info(
+            "Extracted %r: pass=%s detections=%d cbc_rows=%d ocr=%.2fs cache_hit=%s",
+            filename,
+            response_data["ocr_pass_used"],
+            response_data["total_detections"],
+            count_cbc_rows(response_data["structured_data"]),
+            pass_original.get("wall_seconds") or 0.0,
+            pass_original.get("cache_hit", False),
+        )
+        if OCR_LOG_FULL_JSON:
+            logger.info(
+                "Full response_data (OCR_LOG_FULL_JSON=1):\n%s",
+                json.dumps(response_data, indent=2, ensure_ascii=False),
+            )
+
+        with stage_metrics.timer("serialize"):
+            return jsonify(response_data)
+
+    except Exception as e:
+        error_msg = str(e) if str(e) else type(e).__name__
+        logger.exception("Processing failed: %s", error_msg)
+        return jsonify({"success": False, "error": f"Processing failed: {error_msg}"}), 500
+
+
+@app.route("/api/extract/batch", methods=["POST"])
+def extract_report_batch():
+    """
+    Multi-file variant of /api/extract (form field "files", repeated).
+
+    Images go through the OCR engine in mini-batches of OCR_BATCH_SIZE; each
+    entry of "results" has the same shape as a single /api/extract response
+    (or success=false + error for that file), in upload order.
+    """
+    unavailable = _unavailable_response()
+    if unavailable is not None:
+        return unavailable
+
+    received = receive_files(OCR_MAX_BATCH_FILES)
+    files = [f for f in received.getlist("files") + received.getlist("file") if f.filename]
+    if not files:
+        return jsonify({"success": False, "error": "No files provided"}), 400
+    if len(files) > OCR_MAX_BATCH_FILES:
+        return jsonify(
+            {
+                "success": False,
+                "error": f"Too many files. Maximum per batch: {OCR_MAX_BATCH_FILES}",
+            }
+        ), 400
+
+    t_start = datetime.now()
+    results: list = [None] * len(files)
+
+    try:
+        blobs = []
+        slots = []
+        for i, file in enumerate(files):
+            if not allowed_file(file.filename):
+                results[i] = {
+                    "success": False,
+                    "filename": file.filename,
+                    "error": f'File type not allowed. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}',
+                }
+                continue
+            filename = secure_filename(file.filename)
+            try:
+                blobs.append(read_upload(file, filename))
+            except UploadTooLarge as e:
+                results[i] = {"success": False, "filename": filename, "error": str(e)}
+                continue
+            slots.append((i, filename))
+
+        verbose = request_verbose()
+        log_section(
+            "NEW BATCH REQUEST",
+            "files=%d | images=%d | batch_size=%d",
+            len(files),
+            len(slots),
+            OCR_BATCH_SIZE,
+        )
+        outcomes = ocr_uploads(blobs, "batch — original BGR") if blobs else []
+
+        for (i, filename), (pass_original, error) in zip(slots, outcomes):
+            if pass_original is None:
+                results[i] = {"success": False, "filename": filename, "error": error}
+                continue
+            try:
+                structured_original: dict = {}
+                if pass_original["rec_texts"]:
+                    structured_original = parse_ocr_pass(pass_original, verbose)
+                results[i] = build_extract_response(
+                    filename, pass_original, structured_original, verbose=verbose
+                )
+            except Exception as e:
+                error_msg = str(e) if str(e) else type(e).__name__
+                logger.exception("Processing failed for %r: %s", filename, error_msg)
+                results[i] = {"success": False, "filename": filename, "error": f"Processing failed: {error_msg}"}
+
+        elapsed = (datetime.now() - t_start).total_seconds()
+        processed = sum(1 for r in results if r and r.get("success"))
+        images_per_second = len(slots) / elapsed if elapsed > 0 else 0.0
+
+        logger.info(
+            "Batch done: %d/%d ok | %.2fs | %.2f images/sec",
+            processed,
+            len(files),
+            elapsed,
+            images_per_second,
+        )
+
+        with stage_metrics.timer("serialize"):
+            return jsonify(
+                {
+                    "success": processed > 0,
+                    "results": results,
+                    "total_files": len(files),
+                    "processed_files": processed,
+                    "failed_files": len(files) - processed,
+                    "batch_size": OCR_BATCH_SIZE,
+                    "duration_seconds": elapsed,
+                    "images_per_second": images_per_second,
+                    "processed_at": datetime.now().isoformat(),
+                }
+            )
+
+    except Exception as e:
+        error_msg = str(e) if str(e) else type(e).__name__
+        logger.exception("Processing failed: %s", error_msg)
+        return jsonify({"success": False, "error": f"Processing failed: {error_msg}"}), 500
+
+
+if __name__ == "__main__":
+    import os
+
+    port = int(os.environ.get("PORT", 8000))
+
+    print("=" * 78)
+    print("  HMH OCR API (Production Mode)")
+    print(f"  Running on port: {port}")
+    print("=" * 78)
+
+    app.run(host="0.0.0.0", port=port, debug=False)
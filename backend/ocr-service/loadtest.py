@@ -0,0 +1,189 @@
+"""
+Concurrent load generator for the OCR service's /api/extract endpoint.
+
+Runs the same request mix at each concurrency level and reports requests/sec,
+latency percentiles and error rate per level. Pair it with the stub engine to
+measure HTTP handling, parsing and serialisation without PaddleOCR:
+
+  OCR_ENGINE=stub OCR_STUB_LATENCY_MS=80 OCR_POOL_SIZE=4 python app.py
+  python loadtest.py --concurrency 1,2,4,8,16 --requests 200
+
+The stub service does not write json_results/ or raw_data/ bundles
+(OCR_SAVE_ARTIFACTS is forced off): raw_data/ is the stub's replay source
+and the pinned corpus of ocr_code/benchmark_parsers.py. Against a real
+PaddleOCR service, set OCR_SAVE_ARTIFACTS=0 as well unless the run should
+add its requests to raw_data/.
+
+Every request uploads a distinct generated PNG by default, so the OCR result
+cache does not turn the run into a cache benchmark (--images DIR sends real
+files instead, round-robin). --min-rps makes the run exit 1 when the best
+level falls below a floor, for catching throughput regressions in CI.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".webp", ".tiff"}
+
+
+def generated_images(count: int, seed: int = 7) -> list:
+    """`count` distinct small report-like PNGs (dark text bars on white)."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for i in range(count):
+        img = np.full((480, 640, 3), 255, dtype=np.uint8)
+        for row in range(12):
+            y = 20 + row * 36
+            width = int(rng.integers(120, 600))
+            img[y : y + 14, 20 : 20 + width] = rng.integers(0, 80)
+        ok, buf = cv2.imencode(".png", img)
+        if ok:
+            out.append((f"loadtest_{i:05d}.png", buf.tobytes()))
+    return out
+
+
+def directory_images(folder: Path) -> list:
+    return [
+        (p.name, p.read_bytes())
+        for p in sorted(folder.iterdir())
+        if p.suffix.lower() in IMAGE_EXTENSIONS
+    ]
+
+
+def encode_multipart(field: str, filename: str, data: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode("utf-8")
+    body = head + data + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def send_one(url: str, filename: str, data: bytes, timeout: float) -> tuple[float, str | None]:
+    """POST one upload; returns (latency seconds, error or None)."""
+    body, content_type = encode_multipart("file", filename, data)
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            payload = resp.read()
+        error = None if json.loads(payload).get("success") else "success=false"
+    except urllib.error.HTTPError as e:
+        error = f"HTTP {e.code}"
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        error = type(e).__name__
+    return time.perf_counter() - t0, error
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_level(url: str, uploads: list, concurrency: int, requests: int, timeout: float) -> dict:
+    """Fire `requests` uploads from `concurrency` threads; summarise the level."""
+    latencies: list = []
+    errors: dict = {}
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            filename, data = uploads[i % len(uploads)]
+            latency, error = send_one(url, filename, data, timeout)
+            with lock:
+                latencies.append(latency)
+                if error:
+                    errors[error] = errors.get(error, 0) + 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    failed = sum(errors.values())
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000.0 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000.0,
+        "p95_ms": percentile(latencies, 0.95) * 1000.0,
+        "p99_ms": percentile(latencies, 0.99) * 1000.0,
+        "error_rate": failed / len(latencies) if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://localhost:8000/api/extract")
+    ap.add_argument("--concurrency", default="1,2,4,8,16", help="comma-separated levels")
+    ap.add_argument("--requests", type=int, default=100, help="requests per level")
+    ap.add_argument("--images", type=Path, help="upload files from this folder instead of generated PNGs")
+    ap.add_argument("--timeout", type=float, default=120.0)
+    ap.add_argument("--min-rps", type=float, default=0.0, help="exit 1 if the best level is below this")
+    ap.add_argument("--json", type=Path, help="also write the per-level results here")
+    args = ap.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    if args.images:
+        uploads = directory_images(args.images)
+    else:
+        uploads = generated_images(args.requests * len(levels))
+    if not uploads:
+        print("No images to upload.")
+        return 1
+
+    print(f"Target: {args.url} | {args.requests} request(s) per level | {len(uploads)} distinct upload(s)")
+    print(f"{'conc':>5} {'req/s':>8} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    results = []
+    offset = 0
+    for level in levels:
+        # Each level gets its own slice of generated uploads so nothing is a cache hit.
+        batch = uploads[offset:] + uploads[:offset] if not args.images else uploads
+        offset = (offset + args.requests) % len(uploads)
+        r = run_level(args.url, batch, level, args.requests, args.timeout)
+        results.append(r)
+        print(
+            f"{r['concurrency']:>5} {r['rps']:>8.2f} {r['mean_ms']:>9.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['error_rate']:>6.1%}"
+            + (f"  {r['errors']}" if r["errors"] else "")
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    best = max(results, key=lambda r: r["rps"])
+    print(f"\nBest: {best['rps']:.2f} req/s at concurrency {best['concurrency']}")
+    if args.min_rps and best["rps"] < args.min_rps:
+        print(f"❌ Below --min-rps {args.min_rps:.2f}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
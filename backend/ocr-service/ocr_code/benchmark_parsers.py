@@ -0,0 +1,429 @@
+"""
+Offline parser benchmark over the captured OCR bundles in raw_data/.
+
+Replays every bundle through parse_medical_report (CBC extractor used by the
+API) and parse_universal_format, with no PaddleOCR dependency, and reports
+per-document and aggregate parse time plus tracemalloc peak memory (high
+water mark of allocations during the parse), the blocks allocated by the
+parse that are still live when it returns (its output included; from
+snapshot statistics) and memory still retained once the output is dropped,
+and a per-phase summary of the CBC extractor (runs, skips, time, keys added /
+replaced, line-memo hits / misses).
+
+Parse time is also reported in units of a fixed pure-Python calibration loop
+timed in the same process, which is what the time gate compares, so a
+baseline recorded on another machine still applies. The baseline pins the
+corpus: only the files it lists (by sha256) are benchmarked; new files in
+raw_data/ (e.g. written by a running service) are ignored until the next
+--update-baseline. Results are compared against benchmark_baseline.json:
+
+  - corpus file changed / gone → FAIL (baseline no longer applies)
+  - output digest changed     → FAIL (parser behaviour changed)
+  - normalised parse time     → FAIL beyond --time-tolerance (default 30%)
+  - peak / retained memory,   → FAIL beyond --mem-tolerance (default 15%)
+    live blocks after parse     and --mem-slack-kib (default 2 KiB; blocks: 16)
+
+Usage (from ocr_code/):
+  python benchmark_parsers.py                    # run + compare, exit 1 on regression
+  python benchmark_parsers.py --update-baseline  # accept current numbers / outputs
+  python benchmark_parsers.py --repeat 10 --json report.json
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+
+from parsers import parse_medical_report
+from parsers.universal_parser import parse_universal_format
+
+RAW_DATA_DIR = HERE / "raw_data"
+BASELINE_PATH = HERE / "benchmark_baseline.json"
+
+
+def load_bundle(path: Path) -> dict | None:
+    """
+    One raw_data file → parser inputs. Handles both the OCR service bundles
+    (pass_original / chosen_rec_texts_ordered) and ocr_processor.py output
+    (raw_result[0].rec_texts). None when the file holds no OCR lines.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    if "pass_original" in raw or "chosen_rec_texts_ordered" in raw:
+        po = raw.get("pass_original") or {}
+        rec_texts = po.get("rec_texts_ordered") or raw.get("chosen_rec_texts_ordered") or []
+        scan_order = po.get("rec_texts_detector_order")
+        all_text = po.get("all_text") or raw.get("chosen_all_text")
+    else:
+        first = (raw.get("raw_result") or [{}])[0]
+        rec_texts = first.get("rec_texts", []) if isinstance(first, dict) else []
+        scan_order = None
+        all_text = None
+
+    if not rec_texts:
+        return None
+    return {
+        "name": path.name,
+        "rec_texts": rec_texts,
+        "all_text": all_text or " ".join(str(t).strip() for t in rec_texts),
+        "scan_order": scan_order,
+    }
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def load_corpus(raw_dir: Path = RAW_DATA_DIR, pinned: dict | None = None) -> tuple[list, dict, list]:
+    """
+    (docs, corpus, problems): parser inputs, {file name: sha256} of the files
+    read, and the pinned files that are missing or changed. With pinned (a
+    baseline's corpus) only those files are read; otherwise every *.json.
+    """
+    if pinned is None:
+        paths = sorted(raw_dir.glob("*.json"))
+    else:
+        paths = [raw_dir / name for name in sorted(pinned)]
+    docs = []
+    corpus = {}
+    problems = []
+    for path in paths:
+        if not path.exists():
+            problems.append(f"pinned corpus file missing: {path.name}")
+            continue
+        corpus[path.name] = file_sha256(path)
+        if pinned is not None and corpus[path.name] != pinned[path.name]:
+            problems.append(f"pinned corpus file changed: {path.name}")
+            continue
+        doc = load_bundle(path)
+        if doc is not None:
+            docs.append(doc)
+    return docs, corpus, problems
+
+
+def calibrate(repeat: int = 5) -> float:
+    """
+    Best-of-repeat ms of a fixed workload shaped like the parsers' (regex
+    search over report lines, splitting, dict updates). Parse time divided by
+    this is roughly machine-independent.
+    """
+    rx = re.compile(r"(\d+(?:\.\d+)?)\s*(x\s*10\^?\d+\s*/\s*[uμ]?L|g/dL|%|fL|pg)", re.IGNORECASE)
+    lines = [f"Test{i % 23} Result {i % 17 + 0.5} g/dL 13.0 - 17.0 ref" for i in range(400)]
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(25):
+            values = {}
+            for line in lines:
+                m = rx.search(line)
+                if m:
+                    values[line.split(" ", 1)[0].lower()] = (float(m.group(1)), m.group(2))
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def _parse_both(doc: dict) -> tuple:
+    cbc = parse_medical_report(
+        doc["rec_texts"],
+        all_text=doc["all_text"],
+        rec_texts_scan_order=doc["scan_order"],
+        verbose=False,
+    )
+    universal = parse_universal_format(doc["rec_texts"])
+    return cbc, universal
+
+
+def _digest(value) -> str:
+    blob = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def bench_document(doc: dict, repeat: int) -> dict:
+    """Best-of-`repeat` wall time per parser, then one traced run for memory."""
+    cbc_times = []
+    universal_times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        cbc = parse_medical_report(
+            doc["rec_texts"],
+            all_text=doc["all_text"],
+            rec_texts_scan_order=doc["scan_order"],
+            verbose=False,
+        )
+        t1 = time.perf_counter()
+        universal = parse_universal_format(doc["rec_texts"])
+        t2 = time.perf_counter()
+        cbc_times.append(t1 - t0)
+        universal_times.append(t2 - t1)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    output = _parse_both(doc)
+    _, peak = tracemalloc.get_traced_memory()
+    # Blocks the parse left allocated, its output included.
+    live = tracemalloc.take_snapshot().compare_to(before, "filename")
+    live_blocks = sum(stat.count_diff for stat in live if stat.count_diff > 0)
+    del output, live
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "lines": len(doc["rec_texts"]),
+        "cbc_ms": min(cbc_times) * 1000.0,
+        "universal_ms": min(universal_times) * 1000.0,
+        "peak_kib": (peak - base) / 1024.0,
+        "live_blocks": live_blocks,
+        "retained_kib": max(0, current - base) / 1024.0,
+        "digest": _digest([cbc, universal]),
+    }
+
+
+def phase_summary(docs: list) -> dict:
+    """CBC extractor phase report aggregated over one untimed pass of the corpus."""
+    phases: dict = {}
+    for doc in docs:
+        report: list = []
+        parse_medical_report(
+            doc["rec_texts"],
+            all_text=doc["all_text"],
+            rec_texts_scan_order=doc["scan_order"],
+            verbose=False,
+            phase_report=report,
+        )
+        for entry in report:
+            row = phases.setdefault(
+                entry["phase"],
+                {"ran": 0, "skipped": 0, "ms": 0.0, "added": 0, "replaced": 0, "memo_hits": 0, "memo_misses": 0},
+            )
+            row["ran" if entry["ran"] else "skipped"] += 1
+            row["ms"] += entry["ms"]
+            row["added"] += len(entry["added"])
+            row["replaced"] += len(entry["replaced"])
+            row["memo_hits"] += entry["memo_hits"]
+            row["memo_misses"] += entry["memo_misses"]
+    return phases
+
+
+def run_benchmark(docs: list, repeat: int, corpus: dict) -> dict:
+    # One untimed pass so regex compilation / import-time work is not billed to doc #1.
+    for doc in docs:
+        _parse_both(doc)
+
+    # Best of both sides of the timed runs, so a load spike on one side does not skew it.
+    calibration_ms = calibrate(repeat + 5)
+    per_doc = {doc["name"]: bench_document(doc, repeat) for doc in docs}
+    calibration_ms = min(calibration_ms, calibrate(repeat + 5))
+    rows = list(per_doc.values())
+    totals = {
+        "documents": len(rows),
+        "cbc_ms": sum(r["cbc_ms"] for r in rows),
+        "universal_ms": sum(r["universal_ms"] for r in rows),
+        "median_doc_ms": statistics.median(r["cbc_ms"] + r["universal_ms"] for r in rows) if rows else 0.0,
+        "max_peak_kib": max((r["peak_kib"] for r in rows), default=0.0),
+        "live_blocks": sum(r["live_blocks"] for r in rows),
+        "retained_kib": sum(r["retained_kib"] for r in rows),
+    }
+    totals["total_ms"] = totals["cbc_ms"] + totals["universal_ms"]
+    totals["total_units"] = totals["total_ms"] / calibration_ms
+    return {
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "calibration_ms": calibration_ms,
+        "corpus": corpus,
+        "totals": totals,
+        "phases": phase_summary(docs),
+        "documents": per_doc,
+    }
+
+
+def compare_to_baseline(
+    report: dict,
+    baseline: dict,
+    time_tolerance: float,
+    mem_tolerance: float,
+    mem_slack_kib: float = 2.0,
+    block_slack: int = 16,
+) -> tuple[list, list]:
+    """
+    Returns (failures, notes) comparing report against a stored baseline.
+    Parse time is compared in calibration units when both runs have them.
+    """
+    failures = []
+    notes = []
+    base_docs = baseline.get("documents", {})
+    for name, row in report["documents"].items():
+        ref = base_docs.get(name)
+        if ref is None:
+            notes.append(f"new document (not in baseline): {name}")
+            continue
+        if row["digest"] != ref.get("digest"):
+            failures.append(f"output changed: {name} ({ref.get('digest')} → {row['digest']})")
+    for name in base_docs:
+        if name not in report["documents"]:
+            notes.append(f"baseline document missing from corpus: {name}")
+
+    # Aggregates over documents present in both runs only.
+    common = [n for n in report["documents"] if n in base_docs]
+    if common:
+        now_docs = report["documents"]
+        now_ms = sum(now_docs[n]["cbc_ms"] + now_docs[n]["universal_ms"] for n in common)
+        ref_ms = sum(base_docs[n]["cbc_ms"] + base_docs[n]["universal_ms"] for n in common)
+        if baseline.get("calibration_ms"):
+            notes.append(
+                f"parse time (ms, not gated): {ref_ms:.1f} → {now_ms:.1f}; calibration loop "
+                f"{baseline['calibration_ms']:.2f} → {report['calibration_ms']:.2f} ms"
+            )
+            time_check = (
+                "parse time (calibration units)",
+                time_tolerance,
+                0.0,
+                now_ms / report["calibration_ms"],
+                ref_ms / baseline["calibration_ms"],
+            )
+        else:
+            time_check = ("parse time (ms; baseline has no calibration)", time_tolerance, 0.0, now_ms, ref_ms)
+        checks = (
+            time_check,
+            (
+                "peak memory (KiB)",
+                mem_tolerance,
+                mem_slack_kib,
+                max(now_docs[n]["peak_kib"] for n in common),
+                max(base_docs[n]["peak_kib"] for n in common),
+            ),
+            (
+                "retained memory (KiB)",
+                mem_tolerance,
+                mem_slack_kib,
+                sum(now_docs[n]["retained_kib"] for n in common),
+                sum(base_docs[n]["retained_kib"] for n in common),
+            ),
+        )
+        if all("live_blocks" in base_docs[n] for n in common):
+            checks += (
+                (
+                    "live blocks after parse",
+                    mem_tolerance,
+                    block_slack,
+                    sum(now_docs[n]["live_blocks"] for n in common),
+                    sum(base_docs[n]["live_blocks"] for n in common),
+                ),
+            )
+        # Swings within the slack (allocator / interning noise) never fail.
+        for label, tolerance, slack, now, ref in checks:
+            change = (now - ref) / ref if ref else 0.0
+            line = f"{label}: {ref:.1f} → {now:.1f} ({change:+.1%}, tolerance {tolerance:.0%})"
+            regressed = change > tolerance and now - ref > slack
+            (failures if regressed else notes).append(line)
+    return failures, notes
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{'document':<58} {'lines':>5} {'cbc ms':>8} {'univ ms':>8} {'peak KiB':>9} "
+        f"{'blocks':>7} {'kept KiB':>9}"
+    )
+    print("-" * 110)
+    for name, row in report["documents"].items():
+        print(
+            f"{name[:58]:<58} {row['lines']:>5} {row['cbc_ms']:>8.2f} {row['universal_ms']:>8.2f} "
+            f"{row['peak_kib']:>9.1f} {row['live_blocks']:>7} {row['retained_kib']:>9.1f}"
+        )
+    t = report["totals"]
+    print("-" * 110)
+    print(
+        f"{t['documents']} documents | total {t['total_ms']:.1f} ms "
+        f"(cbc {t['cbc_ms']:.1f}, universal {t['universal_ms']:.1f}) = "
+        f"{t['total_units']:.2f} × calibration {report['calibration_ms']:.2f} ms | "
+        f"median/doc {t['median_doc_ms']:.2f} ms | max peak {t['max_peak_kib']:.1f} KiB | "
+        f"live blocks {t['live_blocks']} | retained {t['retained_kib']:.1f} KiB | best of {report['repeat']}"
+    )
+    print(
+        f"\n{'cbc phase':<10} {'ran':>5} {'skipped':>8} {'ms':>9} {'added':>6} {'replaced':>9} "
+        f"{'memo hits':>10} {'misses':>7}"
+    )
+    for phase, row in report.get("phases", {}).items():
+        print(
+            f"{phase:<10} {row['ran']:>5} {row['skipped']:>8} {row['ms']:>9.1f} "
+            f"{row['added']:>6} {row['replaced']:>9} {row['memo_hits']:>10} {row['memo_misses']:>7}"
+        )
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--raw-dir", type=Path, default=RAW_DATA_DIR)
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs per document (best is kept)")
+    ap.add_argument("--time-tolerance", type=float, default=0.30)
+    ap.add_argument("--mem-tolerance", type=float, default=0.15)
+    ap.add_argument("--mem-slack-kib", type=float, default=2.0)
+    ap.add_argument("--block-slack", type=int, default=16)
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--json", type=Path, help="also write the full report here")
+    args = ap.parse_args(argv)
+
+    baseline = None
+    if not args.update_baseline and args.baseline.exists():
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    pinned = baseline.get("corpus") if baseline else None
+    docs, corpus, problems = load_corpus(args.raw_dir, pinned)
+    if not docs:
+        print(f"No OCR bundles found in {args.raw_dir}")
+        return 1
+
+    report = run_benchmark(docs, max(1, args.repeat), corpus)
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\nBaseline written: {args.baseline} ({len(corpus)} corpus files pinned)")
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    failures, notes = compare_to_baseline(
+        report,
+        baseline,
+        args.time_tolerance,
+        args.mem_tolerance,
+        args.mem_slack_kib,
+        args.block_slack,
+    )
+    failures = problems + failures
+    if pinned is not None:
+        unpinned = len(set(p.name for p in args.raw_dir.glob("*.json")) - set(pinned))
+        if unpinned:
+            notes.append(f"{unpinned} file(s) in {args.raw_dir.name}/ not in the pinned corpus (ignored)")
+    print()
+    for line in notes:
+        print(f"  [OK]   {line}")
+    for line in failures:
+        print(f"  [FAIL] {line}")
+    if failures:
+        print(f"\n❌ {len(failures)} regression(s) against {args.baseline.name}")
+        return 1
+    print(f"\n✅ No regressions against {args.baseline.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
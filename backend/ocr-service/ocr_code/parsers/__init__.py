@@ -0,0 +1,62 @@
+"""
+Medical report parsing — CBC-only path for API use.
+
+All uploads are parsed with a single format-agnostic CBC extractor (see
+cbc_core_extractor.py). Legacy per-lab parsers remain in the package for
+reference but are not used by the OCR service.
+"""
+
+from .cbc_core_extractor import LineMatchMemo, extract_cbc_core_fields
+
+__all__ = ["LineMatchMemo", "extract_cbc_core_fields", "parse_medical_report"]
+
+
+def parse_medical_report(
+    rec_texts,
+    all_text=None,
+    *,
+    rec_texts_scan_order=None,
+    verbose: bool = True,
+    log=None,
+    phase_report=None,
+    line_memo=None,
+):
+    """
+    Parse OCR output and return structured haematology_report rows for the
+    14 standard CBC parameters.
+
+    Args:
+        rec_texts: List of OCR line strings (geometry reading order).
+        all_text: Optional full concatenated text (improves full-document regex).
+        rec_texts_scan_order: Optional detector-native order (before geometry sort).
+        verbose: Print step-by-step extraction (ignored when log is given).
+        log: Optional callable receiving each parser log line instead of print.
+        phase_report: Optional list; receives one timing / yield entry per
+            extraction phase (see extract_cbc_core_fields).
+        line_memo: Optional LineMatchMemo shared with other passes over the
+            same report, so repeated lines are not matched again.
+
+    Returns:
+        Dict with haematology_report[], plus empty sections for API compatibility.
+    """
+    if not rec_texts:
+        return {
+            "patient_info": {},
+            "laboratory_info": {},
+            "haematology_report": [],
+            "blood_indices": [],
+            "morphology": {},
+            "footer_info": {},
+            "other_fields": {},
+        }
+
+    # The extractor strips, filters and typo-fixes each distinct line once.
+    return extract_cbc_core_fields(
+        rec_texts,
+        all_text=all_text or None,
+        rec_texts_scan_order=rec_texts_scan_order or None,
+        verbose=verbose,
+        log=log,
+        phase_report=phase_report,
+        line_memo=line_memo,
+    )
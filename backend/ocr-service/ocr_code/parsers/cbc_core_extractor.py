@@ -0,0 +1,1279 @@
+"""
+Format-agnostic CBC extraction from raw OCR text.
+
+Extracts only the 14 standard parameters used by the Health Monitoring Hub API.
+Does not depend on lab-specific layouts: uses line-based and full-text patterns,
+plausibility checks, and unit hints so structured_data matches what Node's
+normalizeCBCUnits() expects (test_name, observed_value, unit).
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+# Keys must match backend/routes/upload.js normalizeCBCUnits + STANDARD_CBC_PARAMS
+CANON_KEYS = [
+    "hemoglobin",
+    "hematocrit",
+    "rbc",
+    "wbc",
+    "platelets",
+    "mcv",
+    "mch",
+    "mchc",
+    "rdw",
+    "neutrophils",
+    "lymphocytes",
+    "monocytes",
+    "eosinophils",
+    "basophils",
+]
+
+# Human-readable labels stored in test_name (substring match in Node).
+# MCH = mean corpuscular hemoglobin (mass), typically pg — not the same as MCHC (concentration, g/dL).
+DISPLAY_NAME = {
+    "hemoglobin": "Hemoglobin",
+    "hematocrit": "Hematocrit",
+    "rbc": "RBC count",
+    "wbc": "WBC count",
+    "platelets": "Platelet count",
+    "mcv": "MCV",
+    "mch": "MCH",
+    "mchc": "MCHC",
+    "rdw": "RDW",
+    "neutrophils": "Neutrophils",
+    "lymphocytes": "Lymphocytes",
+    "monocytes": "Monocytes",
+    "eosinophils": "Eosinophils",
+    "basophils": "Basophils",
+}
+
+# Common OCR misreads on lab reports (substring / whole-line fixes).
+# Use correct dictionary spellings in replacements so regexes and labels stay consistent.
+_OCR_LABEL_FIXES: Tuple[Tuple[str, str], ...] = (
+    (r"(?i)\bymphocytes\b", "Lymphocytes"),
+    (r"(?i)\bymphocyte\b", "Lymphocyte"),
+    (r"(?i)\beutrophils\b", "Neutrophils"),
+    (r"(?i)\beutrophil\b", "Neutrophil"),
+    (r"(?i)\bosinophils\b", "Eosinophils"),
+    (r"(?i)\basophils\b", "Basophils"),
+    (r"(?i)\bonocytes\b", "Monocytes"),
+    (r"(?i)\blatelet\b", "Platelet"),
+    (r"(?i)\bthrombocite\b", "Thrombocyte"),
+    (r"(?i)\bthrombocytes\b", "Thrombocytes"),
+    (r"(?i)\berythrocyte\b", "Erythrocyte"),
+    (r"(?i)\berythrocytes\b", "Erythrocytes"),
+    (r"(?i)\bleucocyte\b", "Leukocyte"),
+    (r"(?i)\bleucocytes\b", "Leukocytes"),
+    # Haem- vs hem-: normalize to US spelling used in DISPLAY_NAME / Node map
+    (r"(?i)\bhaemoglobin\b", "Hemoglobin"),
+    (r"(?i)\bhaematocrit\b", "Hematocrit"),
+    # Printed / OCR typo: extra “r” (hematrocrit — wrong)
+    (r"(?i)\bhematrocrit\b", "Hematocrit"),
+    (r"(?i)\bhaematrocrit\b", "Hematocrit"),
+)
+
+# Canonical 5-part diff % — skip “(Abs)” rows so we don’t pick absolute 10³/µL values.
+_DIFF_PERCENT_KEYS = frozenset(
+    {"neutrophils", "lymphocytes", "monocytes", "eosinophils", "basophils"}
+)
+
+
+def _ctx_has_x10_platelet_wbc(c: str) -> bool:
+    """10³ / 10^3 / x10³ / OCR variants for platelet & WBC count scale."""
+    return any(
+        x in c
+        for x in (
+            "x10^3",
+            "x10³",
+            "×10³",
+            "10^3",
+            "10³",
+            "103/",
+            "10%/μ",
+            "10%/u",
+            "k/ul",
+            "k/µl",
+        )
+    )
+
+
+def _ctx_thou_per_mm3(c: str) -> bool:
+    """Labs often report WBC/platelets as 'thou/mm3' or 'thou/mm³' (×10³/µL)."""
+    cl = c.lower().replace(" ", "")
+    if "thou" not in c.lower():
+        return False
+    return any(x in cl for x in ("thou/mm3", "thou/mm³", "thou/mm^3", "103/mm3", "10^3/mm"))
+
+
+def _normalize_ocr_blob(text: str) -> str:
+    if not text:
+        return ""
+    t = text
+    t = t.replace("\r", "\n")
+    t = re.sub(r"[ \t]+", " ", t)
+    return t.strip()
+
+
+def _compile_label_fixes(fixes: Tuple[Tuple[str, str], ...]) -> re.Pattern[str]:
+    """
+    _OCR_LABEL_FIXES as one alternation: group i matching means fix i applies.
+    Every entry is a case-insensitive whole word and no replacement is another
+    entry's word, so one pass equals applying the fixes one after another.
+    """
+    words = []
+    for pattern, _ in fixes:
+        m = re.fullmatch(r"\(\?i\)\\b(\w+)\\b", pattern)
+        if not m:
+            raise ValueError(f"OCR label fix must be a (?i)\\bword\\b pattern: {pattern!r}")
+        words.append(f"({m.group(1)})")
+    return re.compile(r"(?i)\b(?:" + "|".join(words) + r")\b")
+
+
+_OCR_LABEL_FIX_RX = _compile_label_fixes(_OCR_LABEL_FIXES)
+
+
+def _label_fix(m: re.Match) -> str:
+    return _OCR_LABEL_FIXES[m.lastindex - 1][1]
+
+
+def _apply_ocr_typo_fixes(text: str, log: Optional[Callable[[str], None]] = None) -> str:
+    """Fix common dropped-first-letter OCR errors on known CBC labels."""
+    if not log:
+        return _OCR_LABEL_FIX_RX.sub(_label_fix, text)
+    applied = set()
+
+    def fix(m: re.Match) -> str:
+        repl = _label_fix(m)
+        if repl != m.group(0):
+            applied.add(m.lastindex - 1)
+        return repl
+
+    out = _OCR_LABEL_FIX_RX.sub(fix, text)
+    for i in sorted(applied):
+        pattern, repl = _OCR_LABEL_FIXES[i]
+        log(f"    typo fix: applied {pattern!r} → {repl!r}")
+    return out
+
+
+def _strip_reference_ranges(line: str) -> str:
+    """Remove segments like 12-16 or 4.0 - 5.5 to reduce picking ref values as results."""
+    s = line
+    s = re.sub(
+        r"\b\d+\.?\d*\s*[-–—]\s*\d+\.?\d*\b", " ", s, flags=re.IGNORECASE
+    )
+    return s
+
+
+def _strip_lab_status_suffixes(line: str) -> str:
+    """Remove trailing result flags (Low / High / Borderline) common on printed reports."""
+    s = line
+    s = re.sub(
+        r"(?i)(?<=[\d.%])\s+(?:low|high|borderline|normal|abnormal|panic)\s*$",
+        "",
+        s,
+    )
+    return s.strip()
+
+
+def _match_last_float(m: re.Match) -> Optional[float]:
+    """Return the last numeric capture group (label groups precede the value)."""
+    if not m or not m.lastindex:
+        return None
+    for i in range(m.lastindex, 0, -1):
+        try:
+            return float(m.group(i))
+        except (ValueError, IndexError, TypeError):
+            continue
+    return None
+
+
+# Unit / scale flags a context string can carry. Every flag is a plain substring
+# test on the lower-cased context; _context_flags() computes them all at once.
+_CTX_FLAG_SUBSTRINGS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("lakh", ("lakh",)),
+    ("x10_9", ("x10^9", "x10e9", "10^9")),
+    ("platelet", ("platelet",)),
+    ("mpv_pdw_pct", ("mpv", "pdw", "pct")),
+    ("mean_platelet", ("mean platelet",)),
+    ("per_ul", ("/ul", "/µl", "/cmm")),
+    ("per_cumm", ("/cumm",)),
+    ("absolute", ("absolute",)),
+    ("k_ul", ("k/ul", "k/µl")),
+    ("million", ("million", "mill/")),
+)
+
+
+@lru_cache(maxsize=4096)
+def _context_flags(ctx: str) -> FrozenSet[str]:
+    """
+    All unit / scale flags of a context string, computed once per distinct
+    context. The same line or blob span is checked for every candidate match
+    and every key, so this is memoized.
+    """
+    c = ctx.lower()
+    flags = {name for name, subs in _CTX_FLAG_SUBSTRINGS if any(x in c for x in subs)}
+    if _ctx_thou_per_mm3(c):
+        flags.add("thou")
+    if _ctx_has_x10_platelet_wbc(c):
+        flags.add("x10")
+    return frozenset(flags)
+
+
+# Plausibility rules per key, tried in order: (when, verb, lo, hi).
+# `when` lists flags that must all be set ("!flag": must be unset; empty: always).
+#   "range"        → plausible iff lo <= val <= hi
+#   "accept"       → plausible if lo <= val <= hi, else try the next rule
+#   "reject_below" → implausible if val < lo, else try the next rule
+# A key whose rules all fall through is implausible; unknown keys are plausible.
+_DIFF_RANGE_RULES = (
+    (("per_ul",), "range", 0.0, 20000.0),
+    (("absolute",), "range", 0.0, 20000.0),
+    ((), "range", 0.0, 100.0),
+)
+_PLAUSIBLE_RULES: Dict[str, Tuple[Tuple[Tuple[str, ...], str, float, float], ...]] = {
+    "hemoglobin": (((), "range", 3.0, 25.0),),
+    "hematocrit": (((), "range", 10.0, 70.0),),
+    # Counts above 100 are per µL (millions), otherwise million/µL.
+    "rbc": (
+        ((), "accept", 1e6, 1e7),
+        ((), "range", 1.0, 8.5),
+    ),
+    "wbc": (
+        (("thou",), "range", 0.3, 80.0),
+        (("x10",), "range", 0.5, 50.0),
+        ((), "accept", 500.0, 200000.0),
+        ((), "range", 1.5, 100.0),
+    ),
+    "platelets": (
+        (("lakh",), "range", 0.05, 9.0),
+        # Avoid MPV reference row (e.g. 6.5 - 12.0) mis-read as platelet count.
+        (("x10", "mpv_pdw_pct"), "reject_below", 50.0, 0.0),
+        (("x10", "mean_platelet"), "reject_below", 50.0, 0.0),
+        (("x10",), "range", 5.0, 999.0),
+        (("x10_9",), "range", 0.05, 9.99),
+        # Platelet count in 10³/µL is often 150–450; avoid MPV (≈6–15 fL).
+        (("platelet", "!mpv_pdw_pct"), "accept", 80.0, 650.0),
+        (("platelet", "thou"), "range", 15.0, 500.0),
+        ((), "range", 20.0, 1200000.0),
+    ),
+    "mcv": (((), "range", 50.0, 125.0),),
+    "mch": (((), "range", 14.0, 42.0),),
+    # g/dL typically; some forms show % with the same numeric range (not hematocrit %).
+    "mchc": (((), "range", 26.0, 40.0),),
+    "rdw": (((), "range", 8.0, 28.0),),
+    **{key: _DIFF_RANGE_RULES for key in _DIFF_PERCENT_KEYS},
+}
+
+# Reported unit per key: first (when, unit) rule whose flags hold.
+_DIFF_UNIT_RULES = (
+    (("per_ul",), "/µL"),
+    ((), "%"),
+)
+_UNIT_RULES: Dict[str, Tuple[Tuple[Tuple[str, ...], str], ...]] = {
+    "hemoglobin": (((), "g/dL"),),
+    "hematocrit": (((), "%"),),
+    "rbc": (
+        (("million",), "million/µL"),
+        ((), ""),
+    ),
+    "wbc": (
+        (("thou",), "thou/mm³"),
+        (("x10",), "x10³/µL"),
+        (("k_ul",), "k/µL"),
+        (("per_ul",), "/µL"),
+        (("per_cumm",), "/µL"),
+        ((), ""),
+    ),
+    "platelets": (
+        (("lakh",), "Lakhs/cmm"),
+        (("x10_9",), "x10^9/L"),
+        (("thou",), "thou/mm³"),
+        (("x10",), "x10³/µL"),
+        (("per_ul",), "/µL"),
+        ((), ""),
+    ),
+    "mcv": (((), "fL"),),
+    "mch": (((), "pg"),),
+    "mchc": (((), "g/dL"),),
+    "rdw": (((), "%"),),
+    **{key: _DIFF_UNIT_RULES for key in _DIFF_PERCENT_KEYS},
+}
+
+
+def _rule_applies(when: Tuple[str, ...], flags: FrozenSet[str]) -> bool:
+    for flag in when:
+        if flag[0] == "!":
+            if flag[1:] in flags:
+                return False
+        elif flag not in flags:
+            return False
+    return True
+
+
+def _plausible(key: str, val: float, ctx: str) -> bool:
+    rules = _PLAUSIBLE_RULES.get(key)
+    if rules is None:
+        return True
+    flags = _context_flags(ctx)
+    for when, verb, lo, hi in rules:
+        if not _rule_applies(when, flags):
+            continue
+        if verb == "range":
+            return lo <= val <= hi
+        if verb == "accept":
+            if lo <= val <= hi:
+                return True
+        elif val < lo:  # reject_below
+            return False
+    return False
+
+
+def _unit_for_context(key: str, ctx: str) -> str:
+    rules = _UNIT_RULES.get(key)
+    if rules is None:
+        return ""
+    flags = _context_flags(ctx)
+    for when, unit in rules:
+        if _rule_applies(when, flags):
+            return unit
+    return ""
+
+
+# Order matters where the same key appears twice (e.g. RDW-CV before RDW-SD before generic).
+_LINE_REGEX: List[Tuple[str, re.Pattern[str], Tuple[str, ...]]] = [
+    (
+        "hemoglobin",
+        re.compile(
+            r"(?i)(hemoglobin|haemoglobin|hgb|\bh\.?b\.?\b)(?![^\n]*\bh\.?b\.?c)[^\d]{0,45}(\d+\.?\d*)"
+        ),
+        ("hb", "hgb", "hemoglobin", "haemoglobin"),
+    ),
+    (
+        "hematocrit",
+        re.compile(
+            r"(?i)(hematocrit|haematocrit|hematrocrit|haematrocrit|\bh\.?c\.?t\.?\b|\bpcv\b|packed\s*cell\s*vol(?:ume)?)[^\d]{0,45}(\d+\.?\d*)"
+        ),
+        ("hct", "pcv", "hematocrit", "haematocrit", "hematrocrit", "haematrocrit", "packedcellvol"),
+    ),
+    (
+        "rbc",
+        re.compile(
+            r"(?i)(\b(?:total\s*)?r\.?\s*b\.?\s*c\.?\s*(?:count)?\b|red\s*blood\s*cell|erythrocyte)(?![^\n]{0,8}distrib)[^\d]{0,45}(\d+\.?\d*)"
+        ),
+        ("rbc", "erythrocyte", "redbloodcell"),
+    ),
+    (
+        "wbc",
+        re.compile(
+            r"(?i)(?:total\s*count\s*\(\s*wbc\s*\)(?:\s*,\s*[^\d\n]{0,24})?|"
+            r"total\s*(?:wbc|leukocyte|leucocyte)\s*count|total\s*leucocyte\s*count\s*\(\s*tlc\s*\)|"
+            r"\b(?:tlc|w\.?\s*b\.?\s*c\.?)\b(?!\s*diff)|"
+            r"white\s*blood\s*cell|leukocyte\s*count|leucocyte\s*count)[^\d]{0,75}(\d+\.?\d*)"
+        ),
+        ("tlc", "wbc", "leucocytecount", "leukocytecount", "whitebloodcell"),
+    ),
+    (
+        "platelets",
+        re.compile(
+            r"(?i)\b(\d{2,4})\s+(?:PLATELET\s+COUNT|platelet\s+count)\b"
+        ),
+        ("plateletcount",),
+    ),
+    (
+        "platelets",
+        re.compile(
+            r"(?i)(?:PLATELET\s+COUNT|platelet\s+count)\s+(\d+\.?\d*)(?!\s*[-–]\s*\d)"
+        ),
+        ("plateletcount",),
+    ),
+    (
+        "platelets",
+        re.compile(
+            r"(?i)(platelet(?:s)?(?:\s*count)?|\bplt\b|thrombocyte)[^\d]{0,35}(\d+\.?\d*)(?!\s*[-–]\s*\d)"
+        ),
+        ("plt", "platelet", "thrombocyte"),
+    ),
+    ("mcv", re.compile(r"(?i)(?:^|[^\w])(\bm\.?\s*c\.?\s*v\.?\b|mean\s*corpuscular\s*volume|mean\s*cell\s*volume)[^\d]{0,35}(\d+\.?\d*)"), ("mcv", "meancellvolume", "meancorpuscularvolume")),
+    # MCHC before MCH so a line containing both abbreviations prefers concentration (pg vs g/dL differ).
+    (
+        "mchc",
+        re.compile(
+            r"(?i)(?:^|[^\w])(\bm\.?\s*c\.?\s*h\.?\s*c\.?\b|mean\s*corpuscular\s*h[ae]moglobin\s*conc(?:entration)?|mean\s*cell\s*h[ae]moglobin\s*conc(?:entration)?)[^\d]{0,35}(\d+\.?\d*)(?!\s*[-–]\s*\d)"
+        ),
+        ("mchc", "meancellhamoglobinconc", "meancellhemoglobinconc", "meancorpuscularhamoglobinconc", "meancorpuscularhemoglobinconc"),
+    ),
+    (
+        "mch",
+        re.compile(
+            r"(?i)(?:^|[^\w])(\bm\.?\s*c\.?\s*h\.?\b(?!\s*c)|mean\s*corpuscular\s*h[ae]moglobin\b(?!\s*conc(?:entration)?)|mean\s*cell\s*h[ae]moglobin\b(?!\s*conc(?:entration)?))[^\d]{0,35}(\d+\.?\d*)(?!\s*[-–]\s*\d)"
+        ),
+        ("mch", "meancellhamoglobin", "meancellhemoglobin", "meancorpuscularhamoglobin", "meancorpuscularhemoglobin"),
+    ),
+    # Prefer CV over SD; allow space after hyphen (e.g. "RDW- CV" on paper forms).
+    # Reject picking ref-range endpoints (e.g. "35 - 56") as RDW.
+    ("rdw", re.compile(r"(?i)rdw\s*[-–]\s*cv\b[^\d]{0,30}(\d+\.?\d*)(?!\s*[-–]\s*\d)"), ("rdwcv",)),
+    ("rdw", re.compile(r"(?i)rdw\s*[-–]\s*sd\b[^\d]{0,30}(\d+\.?\d*)(?!\s*[-–]\s*\d)"), ("rdwsd",)),
+    (
+        "rdw",
+        re.compile(
+            r"(?i)(?:\b(?:r\.?\s*d\.?\s*w\.?|rdw)(?:\s*[-–]\s*(?:cv|sd))?\b|red\s*cell\s*distribution\s*width)[^\d]{0,30}(\d+\.?\d*)(?!\s*[-–]\s*\d)"
+        ),
+        ("rdw", "redcelldistributionwidth"),
+    ),
+    (
+        "neutrophils",
+        re.compile(
+            r"(?i)(?:segmented\s*)?neutrophils?\s*\(\s*%\s*\)[^\d]{0,45}(\d+\.?\d*)"
+        ),
+        ("neutrophil(%)", "neutrophils(%)"),
+    ),
+    (
+        "neutrophils",
+        re.compile(
+            r"(?i)((?:segmented\s*)?neutrophil|polymorph)(?:s)?(?!\s*\(\s*abs)(?:\s*\(\s*%\s*\))?[^\d]{0,25}(\d+\.?\d*)"
+        ),
+        ("polymorph", "neutrophil"),
+    ),
+    ("lymphocytes", re.compile(r"(?i)lymphocytes?\s*\(\s*%\s*\)[^\d]{0,45}(\d+\.?\d*)"), ("lymphocyte(%)", "lymphocytes(%)")),
+    ("lymphocytes", re.compile(r"(?i)lymphocytes?(?!\s*\(\s*abs)[^\d]{0,30}(\d+\.?\d*)"), ("lymphocyte",)),
+    ("monocytes", re.compile(r"(?i)monocytes?\s*\(\s*%\s*\)[^\d]{0,45}(\d+\.?\d*)"), ("monocyte(%)", "monocytes(%)")),
+    ("monocytes", re.compile(r"(?i)monocytes?(?!\s*\(\s*abs)[^\d]{0,25}(\d+\.?\d*)"), ("monocyte",)),
+    ("eosinophils", re.compile(r"(?i)eosinophils?\s*\(\s*%\s*\)[^\d]{0,45}(\d+\.?\d*)"), ("eosinophil(%)", "eosinophils(%)")),
+    ("eosinophils", re.compile(r"(?i)eosinophils?(?!\s*\(\s*abs)[^\d]{0,25}(\d+\.?\d*)"), ("eosinophil",)),
+    ("basophils", re.compile(r"(?i)basophils?\s*\(\s*%\s*\)[^\d]{0,45}(\d+\.?\d*)"), ("basophil(%)", "basophils(%)")),
+    ("basophils", re.compile(r"(?i)basophils?(?!\s*\(\s*abs)[^\d]{0,25}(\d+\.?\d*)"), ("basophil",)),
+]
+
+_FULLTEXT_REGEX: List[Tuple[str, re.Pattern[str], Tuple[str, ...]]] = [
+    (
+        "hemoglobin",
+        re.compile(
+            r"(?i)(?:hemoglobin|haemoglobin|hgb|\bhb\b)[\s:.\-–—]*[=]*[\s]*(\d+\.?\d*)",
+            re.MULTILINE,
+        ),
+        ("hb", "hgb", "hemoglobin", "haemoglobin"),
+    ),
+    (
+        "hematocrit",
+        re.compile(
+            r"(?i)(?:hematocrit|haematocrit|hematrocrit|haematrocrit|\bhct\b|\bpcv\b|packed\s*cell\s*vol(?:ume)?)[\s:.\-–—]*[=]*[\s]*(\d+\.?\d*)",
+            re.MULTILINE,
+        ),
+        ("hct", "pcv", "hematocrit", "haematocrit", "hematrocrit", "haematrocrit", "packedcellvol"),
+    ),
+    (
+        "rbc",
+        re.compile(
+            r"(?i)(?:\brbc\b|r\.?\s*b\.?\s*c\.?|red\s*blood\s*cells?)[\s:.\-–—]*[=]*[\s]*(\d+\.?\d*)",
+            re.MULTILINE,
+        ),
+        ("rbc", "redbloodcell"),
+    ),
+    (
+        "wbc",
+        re.compile(
+            r"(?i)(?:total\s*count\s*\(\s*wbc\s*\)|total\s*(?:wbc|leukocyte|leucocyte)\s*count|"
+            r"total\s*leucocyte\s*count\s*\(\s*tlc\s*\)|\bwbc\b|w\.?\s*b\.?\s*c\.?|\btlc\b|"
+            r"total\s*leucocyte|total\s*wbc|leukocyte\s*count|leucocyte\s*count)[\s:.\-–—]*[=]*[\s]*(\d+\.?\d*)",
+            re.MULTILINE,
+        ),
+        ("tlc", "wbc", "leucocytecount", "leukocytecount", "totalleucocyte"),
+    ),
+    (
+        "platelets",
+        re.compile(r"(?i)\b(\d{2,4})\s+platelet\s+count\b", re.MULTILINE),
+        ("plateletcount",),
+    ),
+    (
+        "platelets",
+        re.compile(
+            r"(?i)platelet\s+count\s+(\d+\.?\d*)(?!\s*[-–]\s*\d)",
+            re.MULTILINE,
+        ),
+        ("plateletcount",),
+    ),
+    ("mcv", re.compile(r"(?i)(?:\bmcv\b|m\.?\s*c\.?\s*v\.?|mean\s*corpuscular\s*volume|mean\s*cell\s*volume)[\s:.\-–—]*[=]*[\s]*(\d+\.?\d*)", re.MULTILINE), ("mcv", "meancellvolume", "meancorpuscularvolume")),
+    (
+        "mchc",
+        re.compile(
+            r"(?i)(?:\bmchc\b|m\.?\s*c\.?\s*h\.?\s*c\.?|mean\s*corpuscular\s*h[ae]moglobin\s*conc(?:entration)?|mean\s*cell\s*h[ae]moglobin\s*conc(?:entration)?)[\s:.\-–—]*[=]*[\s]*(\d+\.?\d*)(?!\s*[-–]\s*\d)",
+            re.MULTILINE,
+        ),
+        ("mchc", "meancellhamoglobinconc", "meancellhemoglobinconc", "meancorpuscularhamoglobinconc", "meancorpuscularhemoglobinconc"),
+    ),
+    (
+        "mch",
+        re.compile(
+            r"(?i)(?:\bmch\b(?!\s*c)|m\.?\s*c\.?\s*h\.?\b(?!\s*c)|mean\s*corpuscular\s*h[ae]moglobin\b(?!\s*conc(?:entration)?)|mean\s*cell\s*h[ae]moglobin\b(?!\s*conc(?:entration)?))[\s:.\-–—]*[=]*[\s]*(\d+\.?\d*)(?!\s*[-–]\s*\d)",
+            re.MULTILINE,
+        ),
+        ("mch", "meancellhamoglobin", "meancellhemoglobin", "meancorpuscularhamoglobin", "meancorpuscularhemoglobin"),
+    ),
+    ("rdw", re.compile(r"(?i)rdw\s*[-–]\s*cv[\s:.\-–—]*[=]*[\s]*(\d+\.?\d*)(?!\s*[-–]\s*\d)", re.MULTILINE), ("rdwcv",)),
+    ("rdw", re.compile(r"(?i)rdw\s*[-–]\s*sd[\s:.\-–—]*[=]*[\s]*(\d+\.?\d*)(?!\s*[-–]\s*\d)", re.MULTILINE), ("rdwsd",)),
+    ("rdw", re.compile(r"(?i)(?:\brdw\b|r\.?\s*d\.?\s*w\.?)[\s:.\-–—]*[=]*[\s]*(\d+\.?\d*)(?!\s*[-–]\s*\d)", re.MULTILINE), ("rdw",)),
+    (
+        "neutrophils",
+        re.compile(
+            r"(?i)(?:(?:segmented\s*)?neutrophils?|polymorphs?)[\s%:.\-–—]*[=]*[\s]*(\d+\.?\d*)",
+            re.MULTILINE,
+        ),
+        ("polymorph", "neutrophil"),
+    ),
+    (
+        "lymphocytes",
+        re.compile(r"(?i)lymphocytes?[\s%:.\-–—]*[=]*[\s]*(\d+\.?\d*)", re.MULTILINE),
+        ("lymphocyte",),
+    ),
+    ("monocytes", re.compile(r"(?i)monocytes?[\s%:.\-–—]*[=]*[\s]*(\d+\.?\d*)", re.MULTILINE), ("monocyte",)),
+    ("eosinophils", re.compile(r"(?i)eosinophils?[\s%:.\-–—]*[=]*[\s]*(\d+\.?\d*)", re.MULTILINE), ("eosinophil",)),
+    ("basophils", re.compile(r"(?i)basophils?[\s%:.\-–—]*[=]*[\s]*(\d+\.?\d*)", re.MULTILINE), ("basophil",)),
+]
+
+# Many CBC forms OCR as columns: reference range, %, observed %, then "Neutrophils (%)".
+# Geometry-sorted rec_texts interleave columns so "label then number" regexes mis-associate values.
+# This block matches ref-range % VALUE Label(%) in one blob sweep and overwrites diff % keys.
+_DIFF_REF_PCT_VAL_LABEL: List[Tuple[str, re.Pattern[str], Tuple[str, ...]]] = [
+    (
+        "neutrophils",
+        re.compile(
+            r"(?i)(?:\d+\.?\d*\s*[-–]\s*\d+\.?\d*|<\s*\d+\.?\d*)\s*%\s*(\d+\.?\d*)\s*(?:Segmented\s*)?Neutrophils\s*\(\s*%\s*\)"
+        ),
+        ("%neutrophils(%)", "%segmentedneutrophils(%)"),
+    ),
+    (
+        "lymphocytes",
+        re.compile(
+            r"(?i)(?:\d+\.?\d*\s*[-–]\s*\d+\.?\d*|<\s*\d+\.?\d*)\s*%\s*(\d+\.?\d*)\s*Lymphocytes\s*\(\s*%\s*\)"
+        ),
+        ("%lymphocytes(%)",),
+    ),
+    (
+        "monocytes",
+        re.compile(
+            r"(?i)(?:\d+\.?\d*\s*[-–]\s*\d+\.?\d*|<\s*\d+\.?\d*)\s*%\s*(\d+\.?\d*)\s*Monocytes\s*\(\s*%\s*\)"
+        ),
+        ("%monocytes(%)",),
+    ),
+    (
+        "eosinophils",
+        re.compile(
+            r"(?i)(?:\d+\.?\d*\s*[-–]\s*\d+\.?\d*|<\s*\d+\.?\d*)\s*%\s*(\d+\.?\d*)\s*Eosinophils\s*\(\s*%\s*\)"
+        ),
+        ("%eosinophils(%)",),
+    ),
+    (
+        "basophils",
+        re.compile(
+            r"(?i)(?:\d+\.?\d*\s*[-–]\s*\d+\.?\d*|<\s*\d+\.?\d*)\s*%\s*(\d+\.?\d*)\s*Basophils\s*\(\s*%\s*\)"
+        ),
+        ("%basophils(%)",),
+    ),
+]
+
+
+# ─── Label keyword automaton ───────────────────────────────────────────────────
+# Each pattern's label needs some literal keyword (e.g. "lymphocyte", "mchc", "rbc")
+# to be present; the third element of every table entry lists them, one of which
+# every match contains. Keywords are compared on a "squashed" copy of the text:
+# lowercased, with whitespace, digits, dots and dashes removed — the characters
+# patterns skip with \s* / \.? / [-–] — so they are written squashed too
+# ("rdwcv" for rdw\s*[-–]\s*cv). Deleting characters never splits a keyword, so a
+# pattern whose keywords are all absent from the squashed text cannot match the
+# original. An empty tuple makes the pattern a candidate for every text. When
+# editing a pattern, keep its keywords in step: a keyword that a match does not
+# have to contain makes the index skip lines the pattern would have matched.
+#
+# Reference-range / status-suffix stripping only removes squashed characters or a
+# trailing word, so tagging the raw line is enough: a line whose tag is empty
+# (patient name, address, footer) skips stripping and every regex.
+
+_SQUASH_RX = re.compile(r"[\s\d.\-–—]+")
+# Characters re.IGNORECASE matches to ASCII letters that str.lower() does not map.
+_CASE_FOLD = {0x130: "i", 0x131: "i", 0x17F: "s", 0x212A: "k"}
+
+
+class _SquashTable(dict):
+    """str.translate table filled per code point on first sight: delete, or fold + lower."""
+
+    def __missing__(self, code: int) -> Optional[str]:
+        ch = chr(code)
+        value = None if _SQUASH_RX.match(ch) else _CASE_FOLD.get(code, ch).lower()
+        self[code] = value
+        return value
+
+
+_SQUASH_TABLE = _SquashTable()
+
+
+def _squash(text: str) -> str:
+    # One C-level pass and one output buffer (re.sub + lower() copied the blob three times).
+    return text.translate(_SQUASH_TABLE)
+
+
+class _LabelIndex:
+    """
+    One-scan candidate finder for an ordered (key, pattern, keywords) table.
+
+    All keywords go into a single lookahead alternation, longest first, run
+    over the squashed text: each hit is the longest keyword starting there, and
+    every shorter keyword starting at the same spot is one of its prefixes, so
+    hits map to complete pattern sets. candidates() returns the (key, pattern)
+    entries that can possibly match, in their original priority order.
+    """
+
+    def __init__(self, table: List[Tuple[str, re.Pattern[str], Tuple[str, ...]]]):
+        self.table = [(key, rx) for key, rx, _ in table]
+        by_keyword: Dict[str, set] = {}
+        self._always: set = set()
+        for i, (key, _, keywords) in enumerate(table):
+            if not keywords:
+                self._always.add(i)
+                continue
+            for kw in keywords:
+                if not kw or _squash(kw) != kw:
+                    raise ValueError(f"{key} keyword {kw!r} is not squashed (expected {_squash(kw)!r})")
+                by_keyword.setdefault(kw, set()).add(i)
+        ordered = sorted(by_keyword, key=lambda k: (-len(k), k))
+        self._scanner = re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+        # Keyword found → patterns of every keyword that is a prefix of it.
+        self._hits: Dict[str, FrozenSet[int]] = {
+            kw: frozenset().union(*(ix for k, ix in by_keyword.items() if kw.startswith(k)))
+            for kw in ordered
+        }
+        self._none_found = [self.table[i] for i in sorted(self._always)]
+
+    def candidates(self, text: str) -> List[Tuple[str, re.Pattern[str]]]:
+        found = self._scanner.findall(_squash(text))
+        if not found:
+            return self._none_found
+        hit = self._always.union(*map(self._hits.__getitem__, found))
+        return [self.table[i] for i in sorted(hit)]
+
+
+_LINE_INDEX = _LabelIndex(_LINE_REGEX)
+_FULLTEXT_INDEX = _LabelIndex(_FULLTEXT_REGEX)
+_DIFF_INDEX = _LabelIndex(_DIFF_REF_PCT_VAL_LABEL)
+_DIFF_SECTION_RX = re.compile(r"(?i)differential\s+wbc")
+_ABS_RX = re.compile(r"\(\s*abs\b", re.IGNORECASE)
+_DIGIT_RX = re.compile(r"\d")
+
+# Keys each phase's pattern table can produce (planner skips phases that cannot help).
+_ALL_KEYS = frozenset(CANON_KEYS)
+_LINE_KEYS = frozenset(key for key, _, _ in _LINE_REGEX)
+_FULLTEXT_KEYS = frozenset(key for key, _, _ in _FULLTEXT_REGEX)
+_DIFF_BLOB_KEYS = frozenset(key for key, _, _ in _DIFF_REF_PCT_VAL_LABEL)
+
+
+_BLOB_SPLIT_RX = re.compile(r"[\n\r]+|(?<=\S)\s{2,}")
+
+
+def _choose_lines_from_fixed_texts(fixed_texts: List[str]) -> Tuple[List[str], str]:
+    """Pick per-line OCR vs blob-split (same heuristic as legacy extract)."""
+    j = _normalize_ocr_blob(" ".join(fixed_texts))
+    split_blob = [ln.strip() for ln in _BLOB_SPLIT_RX.split(j) if ln.strip()]
+    mega = max((len(x) for x in split_blob), default=0) if split_blob else 0
+    if len(fixed_texts) >= 5 and (len(split_blob) <= 1 or mega > 800):
+        return list(fixed_texts), f"rec_texts boxes, longest_joined={mega}"
+    if split_blob:
+        return split_blob, f"blob_split lines={len(split_blob)}"
+    return list(fixed_texts), "rec_texts fallback"
+
+
+# Outcome of one line for one key: ((value, unit) of the first plausible
+# match or None, values rejected as implausible before it).
+_LineOutcome = Tuple[Optional[Tuple[float, str]], Tuple[float, ...]]
+_NO_OUTCOMES: Dict[str, _LineOutcome] = {}
+
+
+class _LineStore:
+    """
+    Interned OCR lines of one document.
+
+    Each distinct input string is stripped and typo-fixed once and gets an id;
+    the geometry and detector scan orderings are id lists into `text`. Both
+    orderings hold the same strings permuted, so split pieces are computed once
+    per distinct line and shared (regex outcomes live in LineMatchMemo).
+    """
+
+    def __init__(self):
+        self.text: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._raw_ids: Dict[str, int] = {}
+        self._pieces: Dict[int, List[Tuple[int, int, int, int]]] = {}
+
+    def intern(self, text: str) -> int:
+        i = self._ids.get(text)
+        if i is None:
+            i = self._ids[text] = len(self.text)
+            self.text.append(text)
+        return i
+
+    def add(self, items: Iterable[Any]) -> List[int]:
+        """Ids of the non-blank items, stripped and typo-fixed (cached per raw string)."""
+        ids = []
+        for t in items:
+            if not t:
+                continue
+            raw = str(t)
+            i = self._raw_ids.get(raw)
+            if i is None:
+                stripped = raw.strip()
+                i = self._raw_ids[raw] = self.intern(_apply_ocr_typo_fixes(stripped)) if stripped else -1
+            if i >= 0:
+                ids.append(i)
+        return ids
+
+    def lines(self, ids: List[int]) -> List[str]:
+        return [self.text[i] for i in ids]
+
+    def _split_pieces(self, i: int) -> List[Tuple[int, int, int, int]]:
+        """(length, leading ws, trailing ws, stripped length) of each blob-split piece of line i."""
+        pieces = self._pieces.get(i)
+        if pieces is None:
+            pieces = self._pieces[i] = [
+                (len(p), len(p) - len(p.lstrip()), len(p) - len(p.rstrip()), len(p.strip()))
+                for p in _BLOB_SPLIT_RX.split(_normalize_ocr_blob(self.text[i]))
+            ]
+        return pieces
+
+    def _blob_split_shape(self, ids: List[int]) -> Tuple[int, int]:
+        """
+        (segment count, longest segment) of the blob split
+        _choose_lines_from_fixed_texts would compute, without joining the blob.
+        Lines are joined by one space and start / end with non-whitespace, so a
+        split never crosses a join: the last piece of a line and the first piece
+        of the next merge into one segment.
+        """
+        count = 0
+        mega = 0
+        seg = None  # open segment: [length, leading ws, trailing ws, stripped length]
+        merged = False
+
+        def close() -> None:
+            nonlocal count, mega
+            n = seg[0] - seg[1] - seg[2] if merged else seg[3]
+            if n:
+                count += 1
+                mega = max(mega, n)
+
+        for i in ids:
+            pieces = self._split_pieces(i)
+            head = pieces[0]
+            if seg is None:
+                seg = list(head)
+            else:
+                seg[0] += 1 + head[0]
+                seg[2] = head[2]
+                merged = True
+            for piece in pieces[1:]:
+                close()
+                seg = list(piece)
+                merged = False
+        if seg is not None:
+            close()
+        return count, mega
+
+    def choose_lines(self, ids: List[int]) -> Tuple[List[int], str]:
+        """_choose_lines_from_fixed_texts on an id list; blob-split lines are interned."""
+        count, mega = self._blob_split_shape(ids)
+        if len(ids) >= 5 and (count <= 1 or mega > 800):
+            return list(ids), f"rec_texts boxes, longest_joined={mega}"
+        lines, reason = _choose_lines_from_fixed_texts(self.lines(ids))
+        return [self.intern(t) for t in lines], reason
+
+
+def _try_diff_percent_ref_val_label_blob(
+    blob: str,
+    found: Dict[str, Tuple[float, str, str]],
+    log: Optional[Callable[[str], None]],
+) -> None:
+    if not _DIFF_SECTION_RX.search(blob):
+        return
+    for key, rx in _DIFF_INDEX.candidates(blob):
+        m = rx.search(blob)
+        if not m:
+            continue
+        val = float(m.group(1))
+        ctx = m.group(0)
+        if not _plausible(key, val, ctx):
+            if log:
+                log(f"    [reject diff-blob] {key} value={val} implausible | {ctx[:100]!r}")
+            continue
+        found[key] = (val, "%", ctx)
+        if log:
+            log(f"    [diff-blob] {key} = {val} %  |  ref%%→value→label  |  {ctx[:120]!r}")
+
+
+def _match_line(line: str) -> Dict[str, _LineOutcome]:
+    """
+    Outcome of the line patterns on `line` for all keys, in table order. Keys
+    with neither a plausible match nor a rejected value are left out (a miss).
+    """
+    candidates = _LINE_INDEX.candidates(line)
+    if not candidates:
+        return _NO_OUTCOMES
+    scan = _strip_lab_status_suffixes(_strip_reference_ranges(line))
+    hits: Dict[str, Tuple[float, str]] = {}
+    rejected: Dict[str, List[float]] = {}
+    if len(scan) >= 2:
+        is_abs_row = None
+        for key, rx in candidates:
+            if key in hits:
+                continue
+            if key in _DIFF_PERCENT_KEYS:
+                if is_abs_row is None:
+                    is_abs_row = _ABS_RX.search(line) is not None
+                if is_abs_row:
+                    continue
+            m = rx.search(scan)
+            if not m:
+                continue
+            val = _match_last_float(m)
+            if val is None:
+                continue
+            if not _plausible(key, val, line):
+                rejected.setdefault(key, []).append(val)
+                continue
+            hits[key] = (val, _unit_for_context(key, line))
+    if not hits and not rejected:
+        return _NO_OUTCOMES
+    return {
+        key: (hits.get(key), tuple(rejected.get(key, ())))
+        for key in dict.fromkeys(key for key, _ in candidates)
+        if key in hits or key in rejected
+    }
+
+
+class LineMatchMemo:
+    """
+    Line / line-pair text → outcome of the CBC line patterns for every key.
+
+    Outcomes depend on the text alone, so one memo serves both orderings of a
+    document and any further pass over the same report (e.g. a second,
+    preprocessed image): pass it to extract_cbc_core_fields as line_memo.
+    hits / misses count lookups and feed the phase report.
+    """
+
+    def __init__(self):
+        self.outcomes: Dict[str, Dict[str, _LineOutcome]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, line: str) -> Dict[str, _LineOutcome]:
+        outcomes = self.outcomes.get(line)
+        if outcomes is None:
+            self.misses += 1
+            outcomes = self.outcomes[line] = _match_line(line)
+        else:
+            self.hits += 1
+        return outcomes
+
+
+def _try_line_regexes(
+    lines: List[str],
+    merged_lines: Iterable[str],
+    found: Dict[str, Tuple[float, str, str]],
+    source: str,
+    log: Optional[Callable[[str], None]],
+    memo: LineMatchMemo,
+) -> None:
+    """First plausible match per missing key, line by line, then over line pairs."""
+    for bucket_name, bucket in (("lines", lines), ("line_pairs", merged_lines)):
+        for line in bucket:
+            if len(found) == len(CANON_KEYS):
+                return
+            ctx = line
+            for key, (hit, rejected) in memo.lookup(line).items():
+                if key in found:
+                    continue
+                if log:
+                    for val in rejected:
+                        log(
+                            f"    [reject] {key} value={val} implausible | ctx={ctx[:120]}..."
+                        )
+                if hit is None:
+                    continue
+                val, unit = hit
+                found[key] = (val, unit, ctx)
+                if log:
+                    log(
+                        f"    [line:{source}/{bucket_name}] {key} = {val} {unit}  |  snippet: {ctx[:140]!r}"
+                    )
+
+
+def _try_fulltext(
+    blob: str,
+    existing: Dict[str, Tuple[float, str, str]],
+    log: Optional[Callable[[str], None]],
+) -> None:
+    for key, rx in _FULLTEXT_INDEX.candidates(blob):
+        if key in existing:
+            continue
+        for m in rx.finditer(blob):
+            val = _match_last_float(m)
+            if val is None:
+                continue
+            span_start = max(0, m.start() - 80)
+            span_end = min(len(blob), m.end() + 80)
+            ctx = blob[span_start:span_end]
+            if not _plausible(key, val, ctx):
+                if log:
+                    log(f"    [reject fulltext] {key} value={val} implausible")
+                continue
+            unit = _unit_for_context(key, ctx)
+            existing[key] = (val, unit, ctx)
+            if log:
+                log(
+                    f"    [fulltext] {key} = {val} {unit}  |  snippet: {ctx[:160]!r}"
+                )
+            break
+
+
+def _merge_adjacent_lines(
+    lines: List[str],
+    found: Dict[str, Tuple[float, str, str]],
+) -> Iterator[str]:
+    """
+    Adjacent-line pairs so label and value split across table cells still match
+    (value-before-label included: line i-1 + line i is the forward pair of i-1).
+    Produced lazily: pairs with no digit in either half cannot yield a value and
+    are skipped, and nothing more is built once every key is found.
+    """
+    prev_has_digit = False
+    for i, line in enumerate(lines):
+        has_digit = _DIGIT_RX.search(line) is not None
+        if i and (prev_has_digit or has_digit):
+            if len(found) == len(CANON_KEYS):
+                return
+            yield lines[i - 1] + " " + line
+        prev_has_digit = has_digit
+
+
+class _PhasePlanner:
+    """
+    Runs the extraction phases in order against one shared `found` dict.
+
+    A fill-in phase whose patterns cannot produce any still-missing key is
+    skipped outright; an override phase (the 1c differential sweep, which
+    corrects % values the line pass took from the reference column) always
+    runs. Every phase gets a report entry with its wall time, yield and
+    LineMatchMemo lookups: {"phase", "ran", "reason", "ms", "added",
+    "replaced", "memo_hits", "memo_misses"}.
+    """
+
+    def __init__(
+        self,
+        found: Dict[str, Tuple[float, str, str]],
+        banner: Optional[Callable[[str], None]],
+        log: Optional[Callable[[str], None]],
+        memo: LineMatchMemo,
+    ):
+        self.found = found
+        self.banner = banner
+        self.log = log
+        self.memo = memo
+        self.report: List[Dict[str, Any]] = []
+
+    def missing(self, keys: FrozenSet[str] = _ALL_KEYS) -> FrozenSet[str]:
+        return keys.difference(self.found)
+
+    def skip(self, phase: str, reason: str) -> None:
+        self.report.append(
+            {
+                "phase": phase,
+                "ran": False,
+                "reason": reason,
+                "ms": 0.0,
+                "added": [],
+                "replaced": [],
+                "memo_hits": 0,
+                "memo_misses": 0,
+            }
+        )
+        if self.log:
+            self.log(f"  (PHASE {phase} skipped: {reason})")
+
+    def run(
+        self,
+        phase: str,
+        title: str,
+        keys: FrozenSet[str],
+        fn: Callable[[], None],
+        *,
+        override: bool = False,
+    ) -> None:
+        if not override and not self.missing(keys):
+            self.skip(phase, "no missing key it can fill")
+            return
+        if self.banner:
+            self.banner(f"PHASE {phase} — {title}")
+        before = dict(self.found)
+        hits, misses = self.memo.hits, self.memo.misses
+        t0 = time.perf_counter()
+        fn()
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.report.append(
+            {
+                "phase": phase,
+                "ran": True,
+                "reason": "override" if override else "",
+                "ms": ms,
+                "added": [k for k in self.found if k not in before],
+                "replaced": [k for k in before if self.found[k] != before[k]],
+                "memo_hits": self.memo.hits - hits,
+                "memo_misses": self.memo.misses - misses,
+            }
+        )
+
+
+def extract_cbc_core_fields(
+    rec_texts: List[str],
+    all_text: Optional[str] = None,
+    *,
+    rec_texts_scan_order: Optional[List[str]] = None,
+    verbose: bool = True,
+    log: Optional[Callable[[str], None]] = None,
+    phase_report: Optional[List[Dict[str, Any]]] = None,
+    line_memo: Optional[LineMatchMemo] = None,
+) -> Dict[str, Any]:
+    """
+    Returns structured haematology_report[] entries for the 14 CBC parameters when found.
+
+    rec_texts_scan_order: detector/reading order before geometry sort (Paddle raw order).
+      Multi-column tables often parse more reliably from this order than from
+      top-left sorted boxes.
+
+    verbose: print step-by-step extraction to log (default stdout via log or print).
+      With verbose=False and no log callback nothing is formatted at all.
+
+    phase_report: if given, one entry per phase (1a, 1b, 1c, 2) is appended with
+      whether it ran, its wall time in ms, the keys it added / replaced and
+      its line-memo hits / misses. Phases that cannot fill a missing key are
+      skipped (see _PhasePlanner).
+
+    line_memo: LineMatchMemo to reuse line / line-pair match results across
+      calls (e.g. a second OCR pass over the same report). A fresh one per
+      call is used otherwise.
+    """
+    log_fn = log or (print if verbose else None)
+
+    def banner(title: str) -> None:
+        log_fn("")
+        log_fn("  " + "·" * 68)
+        log_fn(f"  CBC PARSER  {title}")
+        log_fn("  " + "·" * 68)
+
+    store = _LineStore()
+    geom_ids = store.add(rec_texts)
+    texts = store.lines(geom_ids)
+    if log_fn:
+        raw_texts = [str(t).strip() for t in rec_texts if t and str(t).strip()]
+        banner("INPUT")
+        log_fn(f"  rec_texts count: {len(raw_texts)}")
+        if raw_texts:
+            preview_n = min(25, len(raw_texts))
+            log_fn(f"  first {preview_n} raw lines (as received):")
+            for i, t in enumerate(raw_texts[:preview_n]):
+                log_fn(f"    [{i:03d}] {t[:200]!r}")
+            if len(raw_texts) > preview_n:
+                log_fn(f"    ... {len(raw_texts) - preview_n} more line(s)")
+        if texts != raw_texts:
+            banner("OCR TYPO NORMALIZATION")
+            for i, (a, b) in enumerate(zip(raw_texts, texts)):
+                if a != b:
+                    log_fn(f"    [{i:03d}] was: {a[:120]!r}")
+                    log_fn(f"          now: {b[:120]!r}")
+        else:
+            log_fn("  (no typo normalizations applied)")
+
+    if all_text:
+        blob = _apply_ocr_typo_fixes(_normalize_ocr_blob(all_text))
+    else:
+        # Joined from lines that are already fixed (the fixes are idempotent).
+        blob = _normalize_ocr_blob(" ".join(texts))
+
+    geom_line_ids, geom_reason = store.choose_lines(geom_ids)
+    lines_geom = store.lines(geom_line_ids)
+    if log_fn:
+        banner("TEXT BLOB (for regex)")
+        log_fn(f"  all_text length: {len(blob)} chars")
+        log_fn(f"  preview (800 chars): {blob[:800]!r}{'...' if len(blob) > 800 else ''}")
+        log_fn(f"  line source (geometry-ordered input): {geom_reason}")
+
+        banner("SPLIT LINES FOR MATCHING (geometry-ordered)")
+        log_fn(f"  line count for PHASE 1a: {len(lines_geom)}")
+        for i, ln in enumerate(lines_geom[:40]):
+            log_fn(f"    [L{i:03d}] {ln[:180]!r}")
+        if len(lines_geom) > 40:
+            log_fn(f"    ... {len(lines_geom) - 40} more")
+
+    found: Dict[str, Tuple[float, str, str]] = {}
+    if line_memo is None:
+        line_memo = LineMatchMemo()
+    plan = _PhasePlanner(found, banner if log_fn else None, log_fn, line_memo)
+
+    plan.run(
+        "1a",
+        "line + line-pair regex (geometry-ordered)",
+        _LINE_KEYS,
+        lambda: _try_line_regexes(
+            lines_geom,
+            _merge_adjacent_lines(lines_geom, found),
+            found,
+            "geom",
+            log_fn,
+            memo=line_memo,
+        ),
+    )
+
+    scan_ids: List[int] = []
+    if rec_texts_scan_order and plan.missing(_LINE_KEYS):
+        scan_ids = store.add(rec_texts_scan_order)
+
+    if scan_ids and scan_ids != geom_ids:
+
+        def scan_phase() -> None:
+            scan_line_ids, scan_reason = store.choose_lines(scan_ids)
+            lines_scan = store.lines(scan_line_ids)
+            if log_fn:
+                log_fn(f"  line source: {scan_reason} | count={len(lines_scan)}")
+            merged_scan = _merge_adjacent_lines(lines_scan, found)
+            _try_line_regexes(lines_scan, merged_scan, found, "scan", log_fn, memo=line_memo)
+
+        plan.run("1b", "line + line-pair regex (detector scan order)", _LINE_KEYS, scan_phase)
+    elif rec_texts_scan_order and not plan.missing(_LINE_KEYS):
+        plan.skip("1b", "no missing key it can fill")
+    else:
+        plan.skip("1b", "no distinct detector scan order")
+
+    plan.run(
+        "1c",
+        "differential % (ref % value Label) on full blob",
+        _DIFF_BLOB_KEYS,
+        lambda: _try_diff_percent_ref_val_label_blob(blob, found, log_fn),
+        override=True,
+    )
+
+    plan.run(
+        "2",
+        "full-text fallback (missing keys only)",
+        _FULLTEXT_KEYS,
+        lambda: _try_fulltext(blob, found, log_fn),
+    )
+
+    if phase_report is not None:
+        phase_report.extend(plan.report)
+
+    if log_fn:
+        banner("PHASE REPORT")
+        for entry in plan.report:
+            if entry["ran"]:
+                log_fn(
+                    f"    {entry['phase']:>2}  {entry['ms']:7.2f} ms  "
+                    f"added={entry['added']}  replaced={entry['replaced']}  "
+                    f"memo hits={entry['memo_hits']} misses={entry['memo_misses']}"
+                )
+            else:
+                log_fn(f"    {entry['phase']:>2}  skipped ({entry['reason']})")
+        banner("SUMMARY — 14 CBC keys")
+        for key in CANON_KEYS:
+            if key in found:
+                val, unit, ctx = found[key]
+                log_fn(f"    OK   {key:14s}  {val}  {unit!s:12s}  |  {ctx[:100]!r}")
+            else:
+                log_fn(f"    MISS {key:14s}  (no match)")
+
+    haematology: List[Dict[str, str]] = []
+    for key in CANON_KEYS:
+        if key not in found:
+            continue
+        val, unit, _ = found[key]
+        haematology.append(
+            {
+                "test_name": DISPLAY_NAME[key],
+                "observed_value": str(float(val)),
+                "unit": unit,
+            }
+        )
+
+    if log_fn:
+        banner("OUTPUT haematology_report rows")
+        log_fn(f"  rows built: {len(haematology)}")
+        for row in haematology:
+            log_fn(f"    {row}")
+
+    return {
+        "patient_info": {},
+        "laboratory_info": {},
+        "haematology_report": haematology,
+        "blood_indices": [],
+        "morphology": {},
+        "footer_info": {},
+        "other_fields": {},
+    }
+
+
+def summarize_fourteen_fields(structured: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Map haematology_report rows to the 14 canonical CBC keys for logging / JSON export.
+    """
+    template = {
+        k: {
+            "found": False,
+            "observed_value": None,
+            "unit": "",
+            "test_name": None,
+        }
+        for k in CANON_KEYS
+    }
+    if not structured:
+        return template
+
+    rows = structured.get("haematology_report") or []
+    out: Dict[str, Dict[str, Any]] = {k: dict(v) for k, v in template.items()}
+    matched: set = set()
+
+    def assign(row: dict, key: str, tn: str) -> None:
+        if key in matched:
+            return
+        out[key] = {
+            "found": True,
+            "observed_value": row.get("observed_value"),
+            "unit": (row.get("unit") or ""),
+            "test_name": tn,
+        }
+        matched.add(key)
+
+    for row in rows:
+        tn = (row.get("test_name") or "").strip()
+        if not tn:
+            continue
+        tnl = tn.lower()
+        for key in CANON_KEYS:
+            if key in matched:
+                continue
+            if tnl == DISPLAY_NAME[key].lower():
+                assign(row, key, tn)
+
+    keys_by_len = sorted(CANON_KEYS, key=lambda k: len(DISPLAY_NAME[k]), reverse=True)
+    for row in rows:
+        tn = (row.get("test_name") or "").strip()
+        if not tn:
+            continue
+        tnl = tn.lower()
+        for key in keys_by_len:
+            if key in matched:
+                continue
+            dl = DISPLAY_NAME[key].lower()
+            # Only require the canonical label to appear inside the row name — never `tnl in dl`
+            # (e.g. "mch" is a substring of "mchc" and would wrongly map to MCHC).
+            if dl in tnl:
+                assign(row, key, tn)
+                break
+
+    return out
@@ -0,0 +1,67 @@
+"""
+Image and engine-call helpers shared by the Flask front end (app.py) and the
+OCR worker processes (ocr_workers.py).
+
+Only cv2 and NumPy are imported here, so a spawned worker can use these
+without Flask or PaddleOCR.
+"""
+
+import cv2
+import numpy as np
+
+# Page keys app.unwrap_ocr_result() reads; everything else (input images,
+# model settings) is dropped before the result is cached or crosses a
+# process boundary.
+_PAGE_KEYS = ("rec_texts", "rec_scores", "det_polys", "dt_polys", "rec_polys", "polys")
+
+
+def _plain(value):
+    """NumPy arrays / scalars nested in lists → plain Python values."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return type(value)(_plain(v) for v in value)
+    return value
+
+
+def compact_ocr_result(raw):
+    """Strip a Paddle result down to what the front end parses, as plain Python values."""
+    if not raw or not isinstance(raw, list):
+        return raw
+    first = raw[0]
+    if isinstance(first, dict):
+        return [{k: _plain(first[k]) for k in _PAGE_KEYS if first.get(k) is not None}]
+    return _plain(raw)
+
+
+def decode_image(data: bytes):
+    """Encoded upload bytes → BGR array (None if undecodable)."""
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def resize_to_edge(img, max_edge: int):
+    """Downscale so the longest side is at most max_edge (img itself if already small enough)."""
+    h, w = img.shape[:2]
+    m = max(h, w)
+    if m > max_edge:
+        scale = max_edge / float(m)
+        img = cv2.resize(
+            img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA
+        )
+    return img
+
+
+def warmup_image():
+    """White page with a dark bar so the detector and recognizer both run once."""
+    img = np.full((96, 320, 3), 255, dtype=np.uint8)
+    img[36:60, 24:296] = 0
+    return img
+
+
+def ocr_pages(engine, images: list) -> list:
+    """One engine call for images: 3.x predict(list) returns a page each; 2.x ocr() runs per image."""
+    if hasattr(engine, "predict"):
+        return [[page] for page in engine.predict(images)]
+    return [engine.ocr(img) for img in images]
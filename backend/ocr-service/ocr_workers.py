@@ -0,0 +1,325 @@
+"""
+Multi-process OCR worker tier for the Flask front end (app.py).
+
+Each worker process owns one PaddleOCR engine with a pinned CPU thread count.
+The HTTP layer sends encoded image bytes; the worker decodes, resizes, runs
+OCR and sends back a compact, picklable copy of the Paddle page. Geometry
+sort and CBC parsing stay in the front end.
+
+Nothing here imports Flask or PaddleOCR at module level, so workers can be
+started with the "spawn" context on any platform.
+"""
+
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import multiprocessing as mp
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import cv2
+
+from ocr_common import compact_ocr_result, decode_image, ocr_pages, resize_to_edge, warmup_image
+
+logger = logging.getLogger("hmh.ocr.workers")
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Seconds between worker liveness checks while no results arrive.
+_REAP_INTERVAL = 0.5
+
+
+@contextmanager
+def _pinned_thread_env(threads: int):
+    """
+    Math-library thread limits for a worker about to be started.
+
+    A spawned child copies os.environ at start() and re-imports the parent's
+    main module (app.py, as __mp_main__) before _worker_main runs, which
+    loads Paddle, so the limits must already be in the environment it
+    inherits. The parent's own values are restored afterwards.
+    """
+    saved = {var: os.environ.get(var) for var in _THREAD_ENV_VARS}
+    os.environ.update({var: str(threads) for var in _THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _build_engine(engine: str, engine_options: dict, threads: int):
+    if engine == "stub":
+        from stub_engine import StubOcrEngine
+
+        return StubOcrEngine.from_env()
+    from paddleocr import PaddleOCR
+
+    return PaddleOCR(cpu_threads=threads, **engine_options)
+
+
+def _ocr_slots(ocr, images: list, timings: list) -> list:
+    """
+    (payload, error) per image. A batch that raises is re-run one image at a
+    time, as app.run_ocr_batch does, so only the images that fail on their
+    own get an error.
+    """
+    t_ocr = time.perf_counter()
+    try:
+        raws = ocr_pages(ocr, images)
+    except Exception as e:
+        if len(images) == 1:
+            return [(None, str(e) or type(e).__name__)]
+        return [_ocr_slots(ocr, [img], timings)[0] for img in images]
+    share = (time.perf_counter() - t_ocr) / len(images)
+    timings.extend(("det_rec", share) for _ in images)
+    return [({"result": compact_ocr_result(raw), "wall_seconds": share}, None) for raw in raws]
+
+
+def _worker_main(index, engine, engine_options, threads, max_edge, jobs, results):
+    """Entry point of one worker process (thread env vars are set by the parent)."""
+    cv2.setNumThreads(threads)
+
+    try:
+        ocr = _build_engine(engine, engine_options, threads)
+        ocr.ocr(warmup_image())
+    except Exception as e:
+        results.put(("failed", index, f"{type(e).__name__}: {e}"))
+        return
+    results.put(("ready", index, os.getpid()))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, blobs = job
+        t0 = time.perf_counter()
+        outcomes: list = [None] * len(blobs)
+        timings: list = []
+        images = []
+        slots = []
+        for i, data in enumerate(blobs):
+            t_stage = time.perf_counter()
+            img = decode_image(data)
+            timings.append(("decode", time.perf_counter() - t_stage))
+            if img is None:
+                outcomes[i] = (None, "Could not read image file")
+                continue
+            t_stage = time.perf_counter()
+            images.append(resize_to_edge(img, max_edge))
+            timings.append(("resize", time.perf_counter() - t_stage))
+            slots.append(i)
+
+        if images:
+            for i, outcome in zip(slots, _ocr_slots(ocr, images, timings)):
+                outcomes[i] = outcome
+
+        results.put(("done", index, (job_id, outcomes, time.perf_counter() - t0, timings)))
+
+
+class OcrWorkerTier:
+    """
+    Pool of OCR worker processes. submit() queues a list of encoded images on
+    the ready worker with the fewest pending jobs and returns a Future that
+    resolves to one (payload, error) pair per image, where payload is
+    {"result": compact Paddle result, "wall_seconds": float}.
+
+    A worker that dies after warming up is respawned; one that fails to start
+    (or dies while starting) is taken out of rotation and its message kept in
+    error. Either way the jobs it still held fail with RuntimeError. The tier
+    is ready while at least one worker is.
+
+    observe, if given, is called as observe(stage, seconds) for each per-image
+    decode / resize / det_rec timing the workers report. engine is "paddle"
+    or "stub" (see stub_engine.py).
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        engine_options: dict,
+        threads: int,
+        max_edge: int,
+        observe=None,
+        engine: str = "paddle",
+    ):
+        self.workers = workers
+        self._observe = observe
+        self.threads = threads
+        self._worker_args = (engine, engine_options, threads, max_edge)
+        self._ctx = mp.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._jobs: list = [None] * workers
+        self._processes: list = [None] * workers
+        self._lock = threading.Lock()
+        # job_id → (worker index, Future)
+        self._futures: dict = {}
+        self._ids = itertools.count()
+        # "starting" → "ready"; "gone" once out of rotation.
+        self._state = ["starting"] * workers
+        self._pending = [0] * workers
+        self._busy_seconds = [0.0] * workers
+        self._jobs_done = [0] * workers
+        self._restarts = [0] * workers
+        self._pids: list = [None] * workers
+        self._closing = False
+        self._started_at = time.time()
+        self.error: str | None = None
+
+    def _spawn(self, index: int) -> None:
+        """Start worker index on a fresh job queue (a dead worker may have left its old one locked)."""
+        jobs = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, *self._worker_args, jobs, self._results),
+            name=f"ocr-worker-{index}",
+            daemon=True,
+        )
+        with _pinned_thread_env(self.threads):
+            process.start()
+        with self._lock:
+            old = self._jobs[index]
+            self._jobs[index] = jobs
+            self._processes[index] = process
+            self._state[index] = "starting"
+            self._pids[index] = None
+        if old is not None:
+            old.cancel_join_thread()
+            old.close()
+
+    def start(self) -> "OcrWorkerTier":
+        for index in range(self.workers):
+            self._spawn(index)
+        threading.Thread(target=self._collect, name="ocr-worker-results", daemon=True).start()
+        return self
+
+    def _collect(self) -> None:
+        while True:
+            try:
+                kind, index, payload = self._results.get(timeout=_REAP_INTERVAL)
+            except queue.Empty:
+                pass
+            except (EOFError, OSError):
+                return
+            else:
+                self._handle(kind, index, payload)
+            self._reap()
+
+    def _handle(self, kind: str, index: int, payload) -> None:
+        if kind == "ready":
+            with self._lock:
+                self._pids[index] = payload
+                self._state[index] = "ready"
+            logger.info("OCR worker %d ready (pid %s)", index, payload)
+        elif kind == "failed":
+            self.error = payload
+            logger.error("OCR worker %d failed to start: %s", index, payload)
+            self._retire(index, f"OCR worker {index} failed to start: {payload}", respawn=False)
+        elif kind == "done":
+            job_id, outcomes, busy, timings = payload
+            if self._observe is not None:
+                for stage, seconds in timings:
+                    self._observe(stage, seconds)
+            with self._lock:
+                entry = self._futures.pop(job_id, None)
+                # Jobs of a retired worker were already failed and uncounted.
+                if entry is not None:
+                    self._pending[index] -= 1
+                    self._busy_seconds[index] += busy
+                    self._jobs_done[index] += 1
+            if entry is not None:
+                entry[1].set_result(outcomes)
+
+    def _reap(self) -> None:
+        """Retire workers whose process has exited; respawn those that had warmed up."""
+        for index in range(self.workers):
+            with self._lock:
+                process, state = self._processes[index], self._state[index]
+            if state == "gone" or process.exitcode is None:
+                continue
+            if self._closing:
+                self._retire(index, "OCR worker tier shut down", respawn=False)
+                continue
+            if state == "ready":
+                logger.error(
+                    "OCR worker %d (pid %s) died with exit code %s; respawning",
+                    index,
+                    process.pid,
+                    process.exitcode,
+                )
+                self._retire(
+                    index, f"OCR worker {index} died (exit code {process.exitcode})", respawn=True
+                )
+            else:
+                self.error = f"OCR worker {index} exited with code {process.exitcode} while starting"
+                logger.error("%s", self.error)
+                self._retire(index, self.error, respawn=False)
+
+    def _retire(self, index: int, reason: str, respawn: bool) -> None:
+        """Take worker index out of rotation and fail the jobs routed to it."""
+        with self._lock:
+            self._state[index] = "gone"
+            self._pending[index] = 0
+            lost = [job_id for job_id, (i, _) in self._futures.items() if i == index]
+            futures = [self._futures.pop(job_id)[1] for job_id in lost]
+        for future in futures:
+            future.set_exception(RuntimeError(reason))
+        if respawn:
+            self._restarts[index] += 1
+            self._spawn(index)
+
+    @property
+    def ready(self) -> bool:
+        return "ready" in self._state
+
+    def submit(self, blobs: list) -> Future:
+        """Queue blobs on a ready worker (a starting one while none is); RuntimeError if all are gone."""
+        future: Future = Future()
+        with self._lock:
+            candidates = [i for i in range(self.workers) if self._state[i] == "ready"] or [
+                i for i in range(self.workers) if self._state[i] == "starting"
+            ]
+            if not candidates:
+                raise RuntimeError(self.error or "No OCR worker available")
+            index = min(candidates, key=lambda i: self._pending[i])
+            job_id = next(self._ids)
+            self._futures[job_id] = (index, future)
+            self._pending[index] += 1
+            self._jobs[index].put((job_id, blobs))
+        return future
+
+    def shutdown(self) -> None:
+        self._closing = True
+        with self._lock:
+            queues = [jobs for jobs, state in zip(self._jobs, self._state) if state != "gone"]
+        for jobs in queues:
+            jobs.put(None)
+
+    def stats(self) -> dict:
+        uptime = max(time.time() - self._started_at, 1e-9)
+        with self._lock:
+            per_worker = [
+                {
+                    "pid": self._pids[i],
+                    "state": self._state[i],
+                    "alive": self._processes[i] is not None and self._processes[i].is_alive(),
+                    "restarts": self._restarts[i],
+                    "queue_depth": self._pending[i],
+                    "jobs_done": self._jobs_done[i],
+                    "utilisation": round(self._busy_seconds[i] / uptime, 4),
+                }
+                for i in range(self.workers)
+            ]
+            return {
+                "workers": self.workers,
+                "threads_per_worker": self.threads,
+                "ready": self.ready,
+                "error": self.error,
+                "per_worker": per_worker,
+            }
@@ -0,0 +1,98 @@
+"""
+Deterministic stand-in for PaddleOCR, for load tests without a Paddle install.
+
+Selected with OCR_ENGINE=stub. Each image is answered with one of the OCR
+pages captured in ocr_code/raw_data/, chosen by a checksum of the pixels
+(the same image always gets the same page), after sleeping for the
+configured latency to mimic detector + recognizer time:
+
+  OCR_STUB_LATENCY_MS       — fixed latency per image (default 50).
+  OCR_STUB_MS_PER_LINE      — extra latency per replayed text line (default 0).
+  OCR_STUB_RAW_DIR          — directory of *_raw.json bundles (default ocr_code/raw_data).
+
+app.py forces OCR_SAVE_ARTIFACTS off under the stub, so replayed requests
+never add bundles to the corpus they are replayed from.
+
+Exposes the PaddleOCR 3.x surface app.py uses: predict(list) and ocr(img).
+"""
+
+import glob
+import json
+import os
+import time
+import zlib
+
+DEFAULT_RAW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_code", "raw_data")
+
+
+def _page_from_bundle(raw: dict) -> dict | None:
+    """
+    A raw_data file → Paddle 3.x page dict. ocr_processor.py bundles keep
+    the full page (with polys, so geometry sort runs); OCR service bundles
+    only keep text, replayed in detector order.
+    """
+    first = (raw.get("raw_result") or [None])[0]
+    if isinstance(first, dict) and first.get("rec_texts"):
+        page = {"rec_texts": list(first["rec_texts"])}
+        page["rec_scores"] = list(first.get("rec_scores") or [1.0] * len(page["rec_texts"]))
+        if first.get("rec_polys"):
+            page["rec_polys"] = first["rec_polys"]
+        return page
+    po = raw.get("pass_original") or {}
+    texts = po.get("rec_texts_detector_order") or raw.get("chosen_rec_texts_ordered")
+    if texts:
+        return {"rec_texts": list(texts), "rec_scores": [1.0] * len(texts)}
+    return None
+
+
+def load_pages(raw_dir: str = DEFAULT_RAW_DIR) -> list:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(raw_dir, "*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                page = _page_from_bundle(json.load(f))
+        except (OSError, ValueError):
+            continue
+        if page is not None:
+            pages.append(page)
+    return pages
+
+
+class StubOcrEngine:
+    """Replays captured OCR pages with a configurable, sleep-based latency."""
+
+    def __init__(self, latency_ms: float = 50.0, ms_per_line: float = 0.0, raw_dir: str = DEFAULT_RAW_DIR):
+        self.latency = max(0.0, latency_ms) / 1000.0
+        self.per_line = max(0.0, ms_per_line) / 1000.0
+        self.pages = load_pages(raw_dir)
+        if not self.pages:
+            raise RuntimeError(f"Stub OCR engine found no OCR bundles in {raw_dir}")
+
+    @classmethod
+    def from_env(cls) -> "StubOcrEngine":
+        def _float(name: str, default: float) -> float:
+            try:
+                return float(os.environ.get(name, str(default)).strip())
+            except ValueError:
+                return default
+
+        return cls(
+            latency_ms=_float("OCR_STUB_LATENCY_MS", 50.0),
+            ms_per_line=_float("OCR_STUB_MS_PER_LINE", 0.0),
+            raw_dir=os.environ.get("OCR_STUB_RAW_DIR", "").strip() or DEFAULT_RAW_DIR,
+        )
+
+    def _page_for(self, img) -> dict:
+        # Sparse pixel checksum: cheap, and stable for identical uploads.
+        sample = img[::16, ::16].tobytes() if hasattr(img, "tobytes") else repr(img).encode()
+        page = self.pages[zlib.crc32(sample) % len(self.pages)]
+        time.sleep(self.latency + self.per_line * len(page["rec_texts"]))
+        return page
+
+    def predict(self, images):
+        if not isinstance(images, list):
+            images = [images]
+        return [self._page_for(img) for img in images]
+
+    def ocr(self, img):
+        return self.predict([img])
@@ -1,18 +1,40 @@
+import asyncio
 import os
-from typing import Dict, Any, List
+import warnings
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple
 
-import joblib
-import pandas as pd
+import numpy as np
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
-app = FastAPI(title="HMH CBC ML Service")
+from forest_runtime import load_compiled
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    coalescer.start()
+    try:
+        yield
+    finally:
+        await coalescer.stop()
+
+
+app = FastAPI(title="HMH CBC ML Service", lifespan=lifespan)
 
 
 class CBCRequest(BaseModel):
     cbcData: Dict[str, Any]
 
 
+class CBCBatchRequest(BaseModel):
+    cbcData: List[Dict[str, Any]]
+
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 MODEL_DIR = os.path.join(BASE_DIR, "..", "Model")
@@ -22,19 +44,43 @@ MODEL_DIFF_PATH = os.path.join(MODEL_DIR, "model_2_cbc_diff.pkl")
 ENC_CORE_PATH = os.path.join(MODEL_DIR, "label_encoder_m1.pkl")
 ENC_DIFF_PATH = os.path.join(MODEL_DIR, "label_encoder_m2.pkl")
 
+# Written by export_models.py: each model and its label encoder as NumPy arrays.
+MODEL_CORE_COMPILED_PATH = os.path.join(MODEL_DIR, "model_1_core_cbc.npz")
+MODEL_DIFF_COMPILED_PATH = os.path.join(MODEL_DIR, "model_2_cbc_diff.npz")
+
+# "compiled" (.npz, NumPy only), "sklearn" (joblib pickles), or "auto":
+# compiled when both .npz files exist, otherwise the pickles.
+ML_RUNTIME = os.getenv("ML_RUNTIME", "auto").lower()
+
 
 def _load_model(path: str):
+    import joblib  # only the scikit-learn runtime needs joblib / scikit-learn
+
     return joblib.load(path)
 
 
+def _use_compiled() -> bool:
+    if ML_RUNTIME in ("compiled", "sklearn"):
+        return ML_RUNTIME == "compiled"
+    return os.path.exists(MODEL_CORE_COMPILED_PATH) and os.path.exists(MODEL_DIFF_COMPILED_PATH)
+
+
 try:
-    model_core = _load_model(MODEL_CORE_PATH)
-    model_diff = _load_model(MODEL_DIFF_PATH)
-    label_enc_core = _load_model(ENC_CORE_PATH)
-    label_enc_diff = _load_model(ENC_DIFF_PATH)
+    if _use_compiled():
+        MODEL_RUNTIME = "compiled"
+        model_core, label_enc_core = load_compiled(MODEL_CORE_COMPILED_PATH)
+        model_diff, label_enc_diff = load_compiled(MODEL_DIFF_COMPILED_PATH)
+    else:
+        MODEL_RUNTIME = "sklearn"
+        model_core = _load_model(MODEL_CORE_PATH)
+        model_diff = _load_model(MODEL_DIFF_PATH)
+        label_enc_core = _load_model(ENC_CORE_PATH)
+        label_enc_diff = _load_model(ENC_DIFF_PATH)
 except Exception as e:
     raise RuntimeError(f"Failed to load ML artifacts: {e}")
 
+print(f"[ML-SERVICE] Loaded {MODEL_RUNTIME} models from {os.path.normpath(MODEL_DIR)}")
+
 
 CORE_FEATURES: List[str] = [
     "hemoglobin",
@@ -72,14 +118,23 @@ MODEL_FEATURE_TO_CANONICAL: Dict[str, str] = {
 }
 
 
-def build_feature_dataframe(cbc: Dict[str, Any], model) -> pd.DataFrame:
+RDW_IMPUTED_NORMAL: float = 13.0
+
+# Upper bound on rows per /predict/batch call (one feature matrix per model group).
+BATCH_MAX_ROWS = int(os.getenv("ML_BATCH_MAX_ROWS", "10000"))
+
+
+def _model_feature_names(model) -> List[str]:
     feature_names = list(getattr(model, "feature_names_in_", []))
 
     if not feature_names:
         feature_names = list(CANONICAL_TO_MODEL_FEATURE.values())
 
-    RDW_IMPUTED_NORMAL: float = 13.0
+    return feature_names
 
+
+def _feature_row(cbc: Dict[str, Any], feature_names: List[str]) -> Tuple[Dict[str, float], bool]:
+    """One model input row from a CBC dict; also reports whether RDW was imputed."""
     row: Dict[str, float] = {}
     rdw_imputed = False
 
@@ -109,19 +164,329 @@ def build_feature_dataframe(cbc: Dict[str, Any], model) -> pd.DataFrame:
                 else:
                     row[fname] = 0.0
 
+    return row, rdw_imputed
+
+
+def build_feature_dataframe(cbc: Dict[str, Any], model) -> "pd.DataFrame":
+    import pandas as pd
+
+    feature_names = _model_feature_names(model)
+    row, rdw_imputed = _feature_row(cbc, feature_names)
+
     if rdw_imputed:
         print(f"[ML-SERVICE] Imputed RDW={RDW_IMPUTED_NORMAL}% (normal-range default because RDW missing)")
 
     return pd.DataFrame([row], columns=feature_names)
 
 
+class FeatureLayout:
+    """
+    One model's input columns, resolved once from feature_names_in_ at load.
+
+    matrix() fills a preallocated float64 array straight from the CBC dicts,
+    with the same parsing and RDW imputation as _feature_row but without a
+    DataFrame per request. Columns follow feature_names_in_, so the estimator
+    sees exactly what build_feature_dataframe would give it.
+    """
+
+    def __init__(self, model):
+        self.feature_names = _model_feature_names(model)
+        self.source_keys = [MODEL_FEATURE_TO_CANONICAL.get(f) or f for f in self.feature_names]
+        self.rdw_columns = np.array(
+            [MODEL_FEATURE_TO_CANONICAL.get(f) == "rdw" for f in self.feature_names], dtype=bool
+        )
+
+    def matrix(self, cbcs: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows × features array, per-row "RDW was imputed" flags)."""
+        X = np.zeros((len(cbcs), len(self.source_keys)), dtype=np.float64)
+        for r, cbc in enumerate(cbcs):
+            for c, key in enumerate(self.source_keys):
+                val = cbc.get(key)
+                if val is None or val == "":
+                    continue
+                try:
+                    X[r, c] = float(val)
+                except (TypeError, ValueError):
+                    pass
+
+        # Missing and unparseable cells were left at 0.0, which RDW treats as missing too.
+        rdw = X[:, self.rdw_columns]
+        imputed = rdw == 0.0
+        rdw[imputed] = RDW_IMPUTED_NORMAL
+        X[:, self.rdw_columns] = rdw
+        return X, imputed.any(axis=1)
+
+
+# The layouts above already put columns in feature_names_in_ order.
+warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+
+
+def has_differentials(cbc: Dict[str, Any]) -> bool:
+    return any(
+        cbc.get(f) not in (None, "")
+        for f in DIFF_ONLY_FEATURES
+    )
+
+
+# has_differentials → (model, label encoder, artifact name, input layout)
+MODELS: Dict[bool, Tuple[Any, Any, str, FeatureLayout]] = {
+    False: (model_core, label_enc_core, "model_1_core_cbc.pkl", FeatureLayout(model_core)),
+    True: (model_diff, label_enc_diff, "model_2_cbc_diff.pkl", FeatureLayout(model_diff)),
+}
+
+SEVERITY_MAPPING: Dict[str, str] = {
+    "0": "normal",
+    "1": "abnormal",
+    "2": "critical",
+    "normal": "normal",
+    "mild": "abnormal",
+    "moderate": "abnormal",
+    "critical": "critical",
+}
+
+
+def _decode_labels(label_enc, pred_idx) -> List[Any]:
+    try:
+        return list(label_enc.inverse_transform(pred_idx))
+    except Exception:
+        labels = []
+        for idx in pred_idx:
+            try:
+                labels.append(label_enc.inverse_transform([idx])[0])
+            except Exception:
+                labels.append(str(idx))
+        return labels
+
+
+def infer(model, X) -> Tuple[Any, Any]:
+    """
+    (predicted class indices, class probabilities or None) from one model pass.
+
+    A fitted classifier's predict() is the argmax of predict_proba() over
+    classes_ (RandomForestClassifier computes it exactly that way), so the
+    label is derived from the probabilities instead of walking every tree a
+    second time.
+    """
+    if hasattr(model, "predict_proba") and hasattr(model, "classes_"):
+        proba = model.predict_proba(X)
+        return np.asarray(model.classes_).take(np.argmax(proba, axis=1), axis=0), proba
+    pred_idx = model.predict(X)
+    return pred_idx, model.predict_proba(X) if hasattr(model, "predict_proba") else None
+
+
+def score_rows(model, label_enc, X) -> List[Tuple[Any, Any, Dict[str, float]]]:
+    """(label, confidence, class probabilities) per row of X, one inference for all rows."""
+    pred_idx, proba = infer(model, X)
+    labels = _decode_labels(label_enc, pred_idx)
+    classes = getattr(label_enc, "classes_", None)
+    class_names = [str(cls) for cls in classes] if classes is not None else None
+
+    scored = []
+    for r, label in enumerate(labels):
+        conf = None
+        probs: Dict[str, float] = {}
+        if proba is not None:
+            proba_arr = proba[r]
+            if class_names is not None:
+                probs = dict(zip(class_names, proba_arr.tolist()))
+            conf = float(proba_arr.max())
+        scored.append((label, conf, probs))
+    return scored
+
+
+def build_prediction(label, conf, probs: Dict[str, float], used_model: str, used_differentials: bool) -> Dict[str, Any]:
+    predicted_class = str(label).strip()
+    severity_raw = predicted_class
+    severity_norm = severity_raw.lower()
+    severity = SEVERITY_MAPPING.get(severity_norm, SEVERITY_MAPPING.get(severity_raw, "abnormal"))
+
+    return {
+        "severity": severity,
+        "confidence": conf if conf is not None else 0.7,
+        "predictions": probs if probs else {severity: 1.0},
+        "note": "Real ML prediction from trained CBC model",
+        "usedModel": used_model,
+        "predictedClass": predicted_class,
+        "usedDifferentials": used_differentials,
+    }
+
+
+def score_cbcs(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    /predict-shaped results for many CBCs, in input order. Rows are grouped by
+    model (has_differentials) and each group is scored with one inference.
+    """
+    groups: Dict[bool, List[int]] = {False: [], True: []}
+    for i, cbc in enumerate(rows):
+        groups[has_differentials(cbc)].append(i)
+
+    results: List[Dict[str, Any]] = [{} for _ in rows]
+    for used_differentials, indices in groups.items():
+        if not indices:
+            continue
+        model, label_enc, used_model, layout = MODELS[used_differentials]
+        X, rdw_imputed = layout.matrix([rows[i] for i in indices])
+        if len(indices) == 1 and rdw_imputed[0]:
+            print(f"[ML-SERVICE] Imputed RDW={RDW_IMPUTED_NORMAL}% (normal-range default because RDW missing)")
+        elif rdw_imputed.any():
+            print(
+                f"[ML-SERVICE] Imputed RDW={RDW_IMPUTED_NORMAL}% for "
+                f"{int(rdw_imputed.sum())}/{len(indices)} batch row(s)"
+            )
+        for i, (label, conf, probs) in zip(indices, score_rows(model, label_enc, X)):
+            results[i] = build_prediction(label, conf, probs, used_model, used_differentials)
+    return results
+
+
+def _score_each(rows: List[Dict[str, Any]]) -> List[Tuple[Any, Any]]:
+    """(result, None) or (None, exception) per row, scoring rows one at a time."""
+    outcomes = []
+    for cbc in rows:
+        try:
+            outcomes.append((score_cbcs([cbc])[0], None))
+        except Exception as e:
+            outcomes.append((None, e))
+    return outcomes
+
+
+# /predict micro-batching: concurrent calls that arrive within the wait window
+# share one inference per model. ML_COALESCE_MAX_BATCH=1 scores each call alone.
+COALESCE_MAX_WAIT_MS = float(os.getenv("ML_COALESCE_MAX_WAIT_MS", "2"))
+COALESCE_MAX_BATCH = int(os.getenv("ML_COALESCE_MAX_BATCH", "32"))
+
+
+class PredictionCoalescer:
+    """
+    Micro-batches concurrent /predict calls.
+
+    submit() queues a CBC and awaits its result. One collector task takes the
+    first queued call and keeps collecting for up to max_wait_ms, or until
+    max_batch calls are waiting. It then scores the batch with score_cbcs in
+    a worker thread and resolves every caller's future. Calls that arrive
+    while a batch is being scored make up the next one. If a batch fails, its
+    rows are rescored one by one so a bad row only fails its own request.
+
+    A batch that still fails resolves its callers with that exception. The
+    collector is started on the app's event loop by lifespan() (or by the
+    first submit() on another loop) and held in _task; if it ever exits with
+    an error it is restarted on the same queue, so waiting calls are kept.
+    """
+
+    def __init__(self, max_wait_ms: float, max_batch: int):
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self.restarts = 0
+
+    def start(self) -> None:
+        """Bind a fresh queue to the running loop and start the collector on it."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._spawn()
+
+    def _spawn(self) -> None:
+        self._task = self._loop.create_task(self._collect(self._queue))
+        self._task.add_done_callback(self._collector_done)
+
+    def _collector_done(self, task: asyncio.Task) -> None:
+        if task is not self._task or task.cancelled() or self._loop.is_closed():
+            return
+        error = task.exception()
+        print(f"[ML-SERVICE] Prediction collector stopped: {error!r}; restarting")
+        self.restarts += 1
+        self._spawn()
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def submit(self, cbc: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None:
+            self.start()
+        future = loop.create_future()
+        self._queue.put_nowait((cbc, future))
+        return await future
+
+    async def _collect(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            try:
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch:
+                    if not queue.empty():
+                        batch.append(queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._score(batch)
+            except Exception as e:
+                print(f"[ML-SERVICE] Prediction batch of {len(batch)} failed: {e!r}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _score(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        # Callers that went away (client disconnect) are not scored
+        batch = [(cbc, future) for cbc, future in batch if not future.done()]
+        if not batch:
+            return
+        rows = [cbc for cbc, _ in batch]
+        try:
+            outcomes = [(result, None) for result in await asyncio.to_thread(score_cbcs, rows)]
+        except Exception as e:
+            outcomes = [(None, e)] if len(rows) == 1 else await asyncio.to_thread(_score_each, rows)
+
+        self.batches += 1
+        self.rows += len(rows)
+        self.largest_batch = max(self.largest_batch, len(rows))
+        for (_, future), (result, error) in zip(batch, outcomes):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "restarts": self.restarts,
+        }
+
+
+coalescer = PredictionCoalescer(COALESCE_MAX_WAIT_MS, COALESCE_MAX_BATCH)
+
+
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "runtime": MODEL_RUNTIME, "coalescer": coalescer.stats()}
 
 
 @app.post("/predict")
-def predict(req: CBCRequest):
+async def predict(req: CBCRequest):
     cbc = req.cbcData or {}
 
     try:
@@ -137,78 +502,12 @@ def predict(req: CBCRequest):
         input_snapshot["rdw"] = cbc.get("rdw")
         print(f"[ML-SERVICE] inputSnapshot={input_snapshot}")
 
-        has_differentials = any(
-            cbc.get(f) not in (None, "")
-            for f in DIFF_ONLY_FEATURES
-        )
-
-        if has_differentials:
-            X = build_feature_dataframe(cbc, model_diff)
-            pred_idx = model_diff.predict(X)[0]
-            try:
-                label = label_enc_diff.inverse_transform([pred_idx])[0]
-            except Exception:
-                label = str(pred_idx)
-
-            conf = None
-            probs = {}
-            if hasattr(model_diff, "predict_proba"):
-                proba_arr = model_diff.predict_proba(X)[0]
-                classes = getattr(label_enc_diff, "classes_", None)
-                if classes is not None:
-                    for cls, p in zip(classes, proba_arr):
-                        probs[str(cls)] = float(p)
-                conf = float(max(proba_arr))
-
-            used_model = "model_2_cbc_diff.pkl"
-        else:
-            X = build_feature_dataframe(cbc, model_core)
-            pred_idx = model_core.predict(X)[0]
-            try:
-                label = label_enc_core.inverse_transform([pred_idx])[0]
-            except Exception:
-                label = str(pred_idx)
-
-            conf = None
-            probs = {}
-            if hasattr(model_core, "predict_proba"):
-                proba_arr = model_core.predict_proba(X)[0]
-                classes = getattr(label_enc_core, "classes_", None)
-                if classes is not None:
-                    for cls, p in zip(classes, proba_arr):
-                        probs[str(cls)] = float(p)
-                conf = float(max(proba_arr))
-
-            used_model = "model_1_core_cbc.pkl"
-
-        predicted_class = str(label).strip()
-        severity_raw = predicted_class
-        severity_norm = severity_raw.lower()
-        mapping = {
-            "0": "normal",
-            "1": "abnormal",
-            "2": "critical",
-            "normal": "normal",
-            "mild": "abnormal",
-            "moderate": "abnormal",
-            "critical": "critical",
-        }
-        severity = mapping.get(severity_norm, mapping.get(severity_raw, "abnormal"))
-
-        response = {
-            "severity": severity,
-            "confidence": conf if conf is not None else 0.7,
-            "predictions": probs if probs else {severity: 1.0},
-            "note": "Real ML prediction from trained CBC model",
-            "usedModel": used_model,
-            "predictedClass": predicted_class,
-            "usedDifferentials": has_differentials,
-        }
+        response = await coalescer.submit(cbc)
 
         print(
-            f"[ML-SERVICE] usedModel={used_model}, "
-            f"predictedClass={predicted_class}, "
-            f"severity={severity}, "
+            f"[ML-SERVICE] usedModel={response['usedModel']}, "
+            f"predictedClass={response['predictedClass']}, "
+            f"severity={response['severity']}, "
             f"confidence={response['confidence']:.4f}"
         )
 
@@ -219,6 +518,33 @@ def predict(req: CBCRequest):
         raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
 
 
+@app.post("/predict/batch")
+def predict_batch(req: CBCBatchRequest):
+    """
+    Score many CBCs in one call. Rows are grouped by model (has_differentials),
+    each group is scored with a single inference, and results come back in
+    input order with the same shape as /predict.
+    """
+    rows = [cbc or {} for cbc in req.cbcData]
+    if len(rows) > BATCH_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(rows)} rows (max {BATCH_MAX_ROWS})")
+
+    try:
+        results = score_cbcs(rows)
+        diff = sum(1 for r in results if r["usedDifferentials"])
+
+        print(
+            f"[ML-SERVICE] batch rows={len(rows)}, "
+            f"core={len(rows) - diff}, diff={diff}"
+        )
+
+        return {"count": len(results), "results": results}
+
+    except Exception as e:
+        print(f"[ML-SERVICE] Batch prediction failed: {repr(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {e}")
+
+
 if __name__ == "__main__":
     import uvicorn
 
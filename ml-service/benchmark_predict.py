@@ -0,0 +1,168 @@
+"""
+Offline scoring benchmark for the CBC ML service (no HTTP server needed).
+
+Loads the same artifacts as app.py and, for each model, checks that the
+NumPy feature path (FeatureLayout.matrix) gives probabilities identical to
+the reference DataFrame path (app.build_feature_dataframe, or reference_batch
+below for many rows) on a seeded set of synthetic CBCs, including blank,
+non-numeric and zero-RDW inputs, and that app.infer's fused labels (argmax of
+one predict_proba) equal model.predict. It then times a single-row
+/predict-style request on both feature paths, and separate predict +
+predict_proba calls against infer.
+
+Usage (from ml-service/):
+  python benchmark_predict.py                    # verify + time, exit 1 on a mismatch
+  python benchmark_predict.py --rows 2000 --requests 500
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import app
+
+# Canonical key → (low, high) for generated values.
+VALUE_RANGES = {
+    "hemoglobin": (7.0, 18.0),
+    "rbc": (3.0, 6.5),
+    "wbc": (2.0, 20.0),
+    "platelets": (40.0, 600.0),
+    "hematocrit": (25.0, 55.0),
+    "mcv": (60.0, 110.0),
+    "mch": (20.0, 35.0),
+    "mchc": (28.0, 37.0),
+    "rdw": (10.0, 20.0),
+    "lymphocytes": (10.0, 50.0),
+    "monocytes": (1.0, 12.0),
+}
+
+
+def sample_cbcs(count: int, seed: int = 7, differentials: bool = False) -> list:
+    """Synthetic CBC dicts shaped like the Node backend's cbcData, with some messy values."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        cbc = {}
+        for key, (lo, hi) in VALUE_RANGES.items():
+            if key in app.DIFF_ONLY_FEATURES and not differentials:
+                continue
+            r = rng.random()
+            if r < 0.05:
+                cbc[key] = None
+            elif r < 0.08:
+                cbc[key] = ""
+            elif r < 0.10:
+                cbc[key] = "n/a"
+            elif r < 0.20:
+                cbc[key] = f"{rng.uniform(lo, hi):.2f}"
+            else:
+                cbc[key] = round(rng.uniform(lo, hi), 2)
+        if rng.random() < 0.1:
+            cbc["rdw"] = 0
+        rows.append(cbc)
+    return rows
+
+
+def reference_batch(cbcs: list, model):
+    """Many CBC dicts → one DataFrame via app._feature_row, the batch form of build_feature_dataframe."""
+    import pandas as pd
+
+    feature_names = app._model_feature_names(model)
+    rows = [app._feature_row(cbc, feature_names)[0] for cbc in cbcs]
+    return pd.DataFrame(rows, columns=feature_names)
+
+
+def _timed(fn, requests: int) -> list:
+    out = []
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def bench_model(used_differentials: bool, rows: int, requests: int) -> dict:
+    model, _, name, layout = app.MODELS[used_differentials]
+    cbcs = sample_cbcs(rows, differentials=used_differentials)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        reference = model.predict_proba(reference_batch(cbcs, model))
+        X, _ = layout.matrix(cbcs)
+        fast = model.predict_proba(X)
+        fused_ok = bool(np.array_equal(app.infer(model, X)[0], model.predict(X)))
+        row_ok = all(
+            np.array_equal(
+                model.predict_proba(app.build_feature_dataframe(cbc, model)),
+                model.predict_proba(layout.matrix([cbc])[0]),
+            )
+            for cbc in cbcs[: min(rows, 50)]
+        )
+
+        one = cbcs[0]
+        build_df = _timed(lambda: app.build_feature_dataframe(one, model), requests)
+        build_np = _timed(lambda: layout.matrix([one]), requests)
+        score_df = _timed(lambda: model.predict_proba(app.build_feature_dataframe(one, model)), requests)
+        score_np = _timed(lambda: model.predict_proba(layout.matrix([one])[0]), requests)
+        X1 = layout.matrix([one])[0]
+        two_calls = _timed(lambda: (model.predict(X1), model.predict_proba(X1)), requests)
+        fused = _timed(lambda: app.infer(model, X1), requests)
+
+    return {
+        "model": name,
+        "features": len(layout.feature_names),
+        "identical": bool(np.array_equal(reference, fast)) and row_ok,
+        "fused_identical": fused_ok,
+        "build_df_us": statistics.median(build_df) * 1e6,
+        "build_np_us": statistics.median(build_np) * 1e6,
+        "score_df_ms": statistics.median(score_df) * 1e3,
+        "score_np_ms": statistics.median(score_np) * 1e3,
+        "two_calls_ms": statistics.median(two_calls) * 1e3,
+        "fused_ms": statistics.median(fused) * 1e3,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=1000, help="synthetic CBCs per model for the equivalence check")
+    ap.add_argument("--requests", type=int, default=200, help="timed single-row requests per path")
+    args = ap.parse_args(argv)
+
+    results = [bench_model(diff, args.rows, args.requests) for diff in (False, True)]
+
+    print("Feature path (single row):")
+    print(f"{'model':<22} {'same':>5} {'build df us':>12} {'build np us':>12} {'score df ms':>12} {'score np ms':>12}")
+    for r in results:
+        print(
+            f"{r['model']:<22} {'yes' if r['identical'] else 'NO':>5} {r['build_df_us']:>12.1f} "
+            f"{r['build_np_us']:>12.1f} {r['score_df_ms']:>12.3f} {r['score_np_ms']:>12.3f}"
+        )
+
+    print("\nInference (single row, NumPy features):")
+    print(f"{'model':<22} {'same':>5} {'predict+proba ms':>17} {'fused ms':>9} {'saved':>7}")
+    for r in results:
+        saved = 1.0 - r["fused_ms"] / r["two_calls_ms"] if r["two_calls_ms"] else 0.0
+        print(
+            f"{r['model']:<22} {'yes' if r['fused_identical'] else 'NO':>5} "
+            f"{r['two_calls_ms']:>17.3f} {r['fused_ms']:>9.3f} {saved:>7.1%}"
+        )
+
+    ok = True
+    if not all(r["identical"] for r in results):
+        print("\n❌ NumPy feature path disagrees with the DataFrame path")
+        ok = False
+    if not all(r["fused_identical"] for r in results):
+        print("\n❌ Fused inference labels disagree with model.predict")
+        ok = False
+    if ok:
+        print("\n✅ NumPy feature path and fused inference match the reference paths")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Export the CBC random forests to the NumPy runtime in forest_runtime.py.
+
+For each model, loads the joblib artifacts (model + label encoder) from
+Model/, flattens them with forest_runtime.export_forest and checks the
+compiled copy against the scikit-learn model before writing
+Model/<model>.npz. The check scores --validation-csv rows when given (e.g. the
+BDCBC7196 dataset the notebook trained on; only the model's feature columns
+are read) plus --synthetic random rows spread over every feature's split
+thresholds, some placed exactly on a threshold and, when the model accepts
+missing values, some left NaN. Labels must match and probabilities must agree
+within --tolerance, otherwise nothing is written and the exit code is 1.
+
+app.py serves the .npz files when both exist (ML_RUNTIME=auto), so re-run this
+after retraining.
+
+Usage (from ml-service/):
+  python export_models.py
+  python export_models.py --validation-csv BDCBC7196_Hematology_Dataset.csv
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+import forest_runtime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, "..", "Model")
+
+# model artifact → label encoder artifact
+ARTIFACTS = {
+    "model_1_core_cbc.pkl": "label_encoder_m1.pkl",
+    "model_2_cbc_diff.pkl": "label_encoder_m2.pkl",
+}
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+
+
+def _timed_load(fn, path: str):
+    t0 = time.perf_counter()
+    obj = fn(path)
+    return obj, time.perf_counter() - t0
+
+
+def _median_ms(fn, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1e3
+
+
+def _accepts_nan(model) -> bool:
+    """Whether model.predict_proba takes NaN features (scikit-learn >= 1.4 forests do)."""
+    try:
+        model.predict_proba(np.full((1, model.n_features_in_), np.nan))
+    except ValueError:
+        return False
+    return True
+
+
+def synthetic_rows(model, count: int, seed: int = 11) -> np.ndarray:
+    """Random rows covering each feature's split thresholds, with some exact ties, zeros and NaNs."""
+    rng = np.random.default_rng(seed)
+    n_features = model.n_features_in_
+    thresholds = [[] for _ in range(n_features)]
+    for est in model.estimators_:
+        tree = est.tree_
+        split = tree.children_left != -1
+        for f, t in zip(tree.feature[split], tree.threshold[split]):
+            thresholds[f].append(t)
+
+    X = np.zeros((count, n_features))
+    for f, values in enumerate(thresholds):
+        if not values:
+            continue
+        values = np.asarray(values)
+        lo, hi = values.min(), values.max()
+        margin = 0.1 * (hi - lo) + 1.0
+        X[:, f] = rng.uniform(lo - margin, hi + margin, count)
+        ties = rng.random(count) < 0.05
+        X[ties, f] = rng.choice(values, int(ties.sum()))
+    X[rng.random(X.shape) < 0.02] = 0.0
+    if _accepts_nan(model):
+        X[rng.random(X.shape) < 0.02] = np.nan
+        X[rng.random(count) < 0.01] = np.nan
+    return X
+
+
+def validation_csv_rows(path: str, model) -> np.ndarray:
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    columns = [str(c) for c in getattr(model, "feature_names_in_", [])]
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing model feature column(s): {missing}")
+    return df[columns].dropna().to_numpy(dtype=np.float64)
+
+
+def export_model(model_file: str, encoder_file: str, args) -> bool:
+    model_path = os.path.join(MODEL_DIR, model_file)
+    out_path = os.path.join(MODEL_DIR, os.path.splitext(model_file)[0] + ".npz")
+
+    model, pkl_load_s = _timed_load(joblib.load, model_path)
+    label_enc = joblib.load(os.path.join(MODEL_DIR, encoder_file))
+
+    tmp_path = out_path[:-4] + ".tmp.npz"
+    forest_runtime.save_compiled(tmp_path, forest_runtime.export_forest(model, label_enc))
+    (forest, compiled_enc), npz_load_s = _timed_load(forest_runtime.load_compiled, tmp_path)
+
+    sets = []
+    if args.validation_csv:
+        sets.append(("csv", validation_csv_rows(args.validation_csv, model)))
+    if args.synthetic:
+        sets.append(("synthetic", synthetic_rows(model, args.synthetic)))
+
+    ok = [str(c) for c in compiled_enc.classes_] == [str(c) for c in label_enc.classes_]
+    print(f"\n{model_file} → {os.path.basename(out_path)} ({len(forest.roots)} trees, {len(forest.feature)} nodes)")
+    print(f"  label encoder classes: {'same' if ok else 'DIFFERENT'}")
+    for name, X in sets:
+        expected = model.predict_proba(X)
+        got = forest.predict_proba(X)
+        max_diff = float(np.abs(expected - got).max()) if len(X) else 0.0
+        labels_same = bool(np.array_equal(model.predict(X), forest.predict(X)))
+        exact = bool(np.array_equal(expected, got))
+        print(
+            f"  {name:<10} rows={len(X):<6} labels {'same' if labels_same else 'DIFFERENT'}, "
+            f"max |Δp|={max_diff:.3g}{' (bit-identical)' if exact else ''}"
+        )
+        ok = ok and labels_same and max_diff <= args.tolerance
+
+    X1 = sets[-1][1][:1] if sets else np.zeros((1, model.n_features_in_))
+    print(f"  load      pkl {pkl_load_s * 1e3:9.1f} ms   npz {npz_load_s * 1e3:9.1f} ms")
+    print(
+        f"  1 row     sklearn {_median_ms(lambda: model.predict_proba(X1), args.repeats):7.3f} ms   "
+        f"numpy {_median_ms(lambda: forest.predict_proba(X1), args.repeats):7.3f} ms"
+    )
+    print(
+        f"  size      pkl {os.path.getsize(model_path) / 1e6:9.1f} MB   "
+        f"npz {os.path.getsize(tmp_path) / 1e6:9.1f} MB"
+    )
+
+    if ok:
+        os.replace(tmp_path, out_path)
+        print(f"  ✅ wrote {os.path.normpath(out_path)}")
+    else:
+        os.remove(tmp_path)
+        print("  ❌ compiled model disagrees with scikit-learn; nothing written")
+    return ok
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--validation-csv", help="CSV with the models' feature columns (e.g. the training dataset)")
+    ap.add_argument("--synthetic", type=int, default=5000, help="random validation rows per model (0 to skip)")
+    ap.add_argument("--tolerance", type=float, default=1e-9, help="max allowed probability difference")
+    ap.add_argument("--repeats", type=int, default=50, help="timed single-row calls per runtime")
+    args = ap.parse_args(argv)
+
+    results = [export_model(model_file, enc_file, args) for model_file, enc_file in ARTIFACTS.items()]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Pure-NumPy runtime for the CBC random forests.
+
+export_models.py flattens a fitted RandomForestClassifier and its label
+encoder into one .npz of plain arrays (export_forest / save_compiled).
+load_compiled() reads that file back as a CompiledForest and a
+CompiledLabelEncoder, which app.py uses in place of the joblib-loaded
+estimators. Serving from these needs NumPy only.
+
+Layout: the nodes of every tree are concatenated into one table with global
+child indices, and each leaf has one row of class probabilities (the row
+DecisionTreeClassifier.predict_proba returns for it). All (row, tree) pairs
+descend together one level per step, dropping out as they reach a leaf.
+A NaN feature value follows each node's missing_go_to_left flag (scikit-learn
+>= 1.3; older trees have no flag and send NaN right, which is what an
+all-zero flag does here).
+Leaf rows are summed over trees in estimator order and divided by the tree
+count, which is how ForestClassifier.predict_proba averages them, so the
+probabilities match the scikit-learn model exactly.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 2
+
+# Rows × trees walked at once; bounds the temporaries for large /predict/batch calls.
+_BLOCK_CELLS = 1 << 16
+
+
+def _leaf_probabilities(value: np.ndarray) -> np.ndarray:
+    """
+    Per-leaf class probabilities from tree_.value[leaves, 0, :n_classes].
+
+    scikit-learn >= 1.4 stores class fractions and predict_proba returns them
+    as they are; older trees stored weighted counts, which predict_proba
+    normalised per row. Counts are normalised here the same way.
+    """
+    value = np.asarray(value, dtype=np.float64)
+    sums = value.sum(axis=1)
+    if np.allclose(sums[sums > 0], 1.0):
+        return value.copy()
+    normalizer = sums[:, np.newaxis]
+    normalizer[normalizer == 0.0] = 1.0
+    return value / normalizer
+
+
+def _label_array(classes) -> np.ndarray:
+    """classes_ as an array savez can store without pickling (object labels become str)."""
+    arr = np.asarray(classes)
+    if arr.dtype.kind in "biufU":
+        return arr
+    return np.asarray([str(c) for c in arr])
+
+
+def export_forest(model, label_enc) -> Dict[str, np.ndarray]:
+    """Flattened node arrays for a fitted single-output forest classifier and its label encoder."""
+    estimators = getattr(model, "estimators_", None)
+    if not estimators or getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("Expected a fitted single-output forest classifier (estimators_ with tree_)")
+
+    n_classes = len(model.classes_)
+    children, features, thresholds, missing_left, leaf_rows, leaf_proba, roots = [], [], [], [], [], [], []
+    n_nodes = n_leaves = 0
+
+    for est in estimators:
+        tree = est.tree_
+        is_leaf = tree.children_left == -1
+
+        left = np.where(is_leaf, -1, tree.children_left + n_nodes)
+        right = np.where(is_leaf, -1, tree.children_right + n_nodes)
+        children.append(np.stack([left, right], axis=1).ravel())
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        go_left = getattr(tree, "missing_go_to_left", None)
+        if go_left is None:
+            go_left = np.zeros(tree.node_count, dtype=bool)
+        missing_left.append(np.asarray(go_left, dtype=bool) & ~is_leaf)
+
+        rows = np.full(tree.node_count, -1)
+        rows[is_leaf] = np.arange(int(is_leaf.sum())) + n_leaves
+        leaf_rows.append(rows)
+        leaf_proba.append(_leaf_probabilities(tree.value[is_leaf, 0, :n_classes]))
+
+        roots.append(n_nodes)
+        n_nodes += tree.node_count
+        n_leaves += int(is_leaf.sum())
+
+    feature_names = getattr(model, "feature_names_in_", None)
+    if feature_names is None:
+        feature_names = [f"x{i}" for i in range(model.n_features_in_)]
+
+    return {
+        "format_version": np.array(FORMAT_VERSION),
+        "children": np.concatenate(children).astype(np.int32),
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "missing_left": np.concatenate(missing_left),
+        "leaf_row": np.concatenate(leaf_rows).astype(np.int32),
+        "leaf_proba": np.concatenate(leaf_proba),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "classes": _label_array(model.classes_),
+        "feature_names": np.asarray([str(f) for f in feature_names]),
+        "label_classes": _label_array(label_enc.classes_),
+    }
+
+
+def save_compiled(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    np.savez_compressed(path, **arrays)
+
+
+class CompiledForest:
+    """
+    Array-backed stand-in for a fitted RandomForestClassifier.
+
+    Exposes the parts app.py uses: classes_, feature_names_in_,
+    n_features_in_, predict_proba() and predict().
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.children = arrays["children"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.missing_left = arrays["missing_left"]
+        self.leaf_row = arrays["leaf_row"]
+        self.leaf_proba = arrays["leaf_proba"]
+        self.roots = arrays["roots"]
+        self.classes_ = arrays["classes"]
+        self.feature_names_in_ = arrays["feature_names"].astype(object)
+        self.n_features_in_ = len(self.feature_names_in_)
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index reached in every tree, shape (rows, trees)."""
+        # Trees split on float32 copies of X, as sklearn does; NaN goes left where missing_left is set.
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_trees = X.shape[0], len(self.roots)
+        values = X.ravel()
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.intp) * X.shape[1], n_trees)
+
+        node = np.tile(self.roots, n_rows)
+        active = np.arange(node.size)
+        current = node
+        while True:
+            split = self.leaf_row[current] < 0
+            active = active[split]
+            if not active.size:
+                break
+            current = current[split]
+            x = values[row_offset[active] + self.feature[current]]
+            go_right = ~((x <= self.threshold[current]) | (np.isnan(x) & self.missing_left[current]))
+            current = self.children[2 * current + go_right]
+            node[active] = current
+        return node.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}; expected (n, {self.n_features_in_})")
+
+        out = np.empty((X.shape[0], self.leaf_proba.shape[1]), dtype=np.float64)
+        block = max(1, _BLOCK_CELLS // len(self.roots))
+        for start in range(0, X.shape[0], block):
+            leaves = self.leaf_row[self.apply(X[start:start + block])]
+            # Trees on the outer axis: np.sum adds them one after another in estimator order.
+            out[start:start + block] = self.leaf_proba[leaves.T].sum(axis=0)
+        out /= len(self.roots)
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+class CompiledLabelEncoder:
+    """classes_ and inverse_transform() of a fitted LabelEncoder."""
+
+    def __init__(self, classes: np.ndarray):
+        self.classes_ = classes
+
+    def inverse_transform(self, y) -> np.ndarray:
+        y = np.asarray(y)
+        if y.size and (y.min() < 0 or y.max() >= len(self.classes_)):
+            raise ValueError(f"y contains previously unseen labels: {sorted(set(y.tolist()))}")
+        return self.classes_[y]
+
+
+def load_compiled(path: str) -> Tuple[CompiledForest, CompiledLabelEncoder]:
+    """(forest, label encoder) from an export_models.py artifact."""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    version = int(arrays.get("format_version", -1))
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"{path}: unsupported compiled model format {version} "
+            f"(expected {FORMAT_VERSION}; re-run export_models.py)"
+        )
+    return CompiledForest(arrays), CompiledLabelEncoder(arrays["label_classes"])
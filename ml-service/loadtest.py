@@ -0,0 +1,163 @@
+"""
+Concurrent load generator for the ML service's /predict endpoint.
+
+Runs the same request mix at each concurrency level and reports requests/sec,
+latency percentiles and error rate per level, plus the /health coalescer
+counters (mean batch size) when the service exposes them. Compare micro-
+batching on and off by restarting the service with ML_COALESCE_MAX_BATCH=1:
+
+  ML_COALESCE_MAX_WAIT_MS=2 python app.py
+  python loadtest.py --concurrency 1,4,16,32 --requests 400
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# Canonical key → (low, high); the last two only go into "with differentials" bodies.
+CBC_RANGES = {
+    "hemoglobin": (7.0, 18.0),
+    "rbc": (3.0, 6.5),
+    "wbc": (2.0, 20.0),
+    "platelets": (40.0, 600.0),
+    "hematocrit": (25.0, 55.0),
+    "mcv": (60.0, 110.0),
+    "mch": (20.0, 35.0),
+    "mchc": (28.0, 37.0),
+    "rdw": (10.0, 20.0),
+    "lymphocytes": (10.0, 50.0),
+    "monocytes": (1.0, 12.0),
+}
+
+
+def request_bodies(count: int, seed: int = 7) -> list:
+    """`count` CBC dicts, alternating core-only and with differentials so both models see traffic."""
+    rng = random.Random(seed)
+    keys = list(CBC_RANGES)
+    bodies = []
+    for i in range(count):
+        used = keys if i % 2 else keys[:-2]
+        bodies.append({k: round(rng.uniform(*CBC_RANGES[k]), 2) for k in used})
+    return bodies
+
+
+def post_json(url: str, payload: dict, timeout: float) -> tuple[float, str | None]:
+    """POST one JSON body; returns (latency seconds, error or None)."""
+    req = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            json.loads(resp.read())
+        error = None
+    except urllib.error.HTTPError as e:
+        error = f"HTTP {e.code}"
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        error = type(e).__name__
+    return time.perf_counter() - t0, error
+
+
+def get_json(url: str) -> dict:
+    try:
+        with urllib.request.urlopen(url, timeout=10) as resp:
+            return json.loads(resp.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return {}
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_level(url: str, bodies: list, concurrency: int, requests: int, timeout: float) -> dict:
+    """Fire `requests` CBCs from `concurrency` threads; summarise the level."""
+    latencies: list = []
+    errors: dict = {}
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            latency, error = post_json(url, {"cbcData": bodies[i % len(bodies)]}, timeout)
+            with lock:
+                latencies.append(latency)
+                if error:
+                    errors[error] = errors.get(error, 0) + 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    failed = sum(errors.values())
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000.0 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000.0,
+        "p95_ms": percentile(latencies, 0.95) * 1000.0,
+        "p99_ms": percentile(latencies, 0.99) * 1000.0,
+        "error_rate": failed / len(latencies) if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://localhost:5001")
+    ap.add_argument("--concurrency", default="1,4,16,32", help="comma-separated levels")
+    ap.add_argument("--requests", type=int, default=200, help="requests per level")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--json", type=Path, help="also write the per-level results here")
+    args = ap.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    bodies = request_bodies(512)
+    base = args.url.rstrip("/")
+
+    print(f"Target: {base}/predict | {args.requests} request(s) per level")
+    print(f"{'conc':>5} {'req/s':>8} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'batch':>6}")
+    results = []
+    for level in levels:
+        before = get_json(f"{base}/health").get("coalescer") or {}
+        r = run_level(f"{base}/predict", bodies, level, args.requests, args.timeout)
+        after = get_json(f"{base}/health").get("coalescer") or {}
+        batches = after.get("batches", 0) - before.get("batches", 0)
+        r["mean_batch"] = (after.get("rows", 0) - before.get("rows", 0)) / batches if batches else 0.0
+        results.append(r)
+        print(
+            f"{r['concurrency']:>5} {r['rps']:>8.2f} {r['mean_ms']:>9.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['error_rate']:>6.1%} {r['mean_batch']:>6.1f}"
+            + (f"  {r['errors']}" if r["errors"] else "")
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    best = max(results, key=lambda r: r["rps"])
+    print(f"\nBest: {best['rps']:.2f} req/s at concurrency {best['concurrency']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())